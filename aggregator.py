@@ -1,6 +1,11 @@
 import os
 import json
+import argparse
 from datetime import datetime
+from diff_cache import DiffCache
+from diffs import DIFF_VERSION, EventWriter, describe, diff_snapshots
+from history import SnapshotHistory, history_dir
+from store import VacancyStore, store_path
 
 def log(message):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
@@ -20,57 +25,80 @@ for f in files:
         dated_files.append((date, f))
     except ValueError:
         log(f"Invalid date in file: {f}")
-dated_files.sort(key=lambda x: x[0])  # Sort by date
-
-# Load data for each file
-data_by_date = {}
-for date, file in dated_files:
-    path = os.path.join(data_dir, file)
-    with open(path, 'r', encoding='utf-8') as f:
-        data_by_date[date] = json.load(f)
-
-# Get sorted dates
-sorted_dates = sorted(data_by_date.keys())
-
-# Compare consecutive days
-for i in range(1, len(sorted_dates)):
-    prev_date = sorted_dates[i-1]
-    curr_date = sorted_dates[i]
-    prev_data = data_by_date[prev_date]
-    curr_data = data_by_date[curr_date]
-
-    log(f"Comparing {prev_date} to {curr_date}")
-
-    prev_properties = {p['name']: p for p in prev_data.get('properties', [])}
-    curr_properties = {p['name']: p for p in curr_data.get('properties', [])}
-
-    all_property_names = set(prev_properties.keys()) | set(curr_properties.keys())
 
-    total_added_sqft = 0
-    total_removed_sqft = 0
+# Days whose file was removed by `history.py migrate --remove` are read from the history
+history = SnapshotHistory(history_dir(data_dir))
+listed = {date for date, _ in dated_files}
+for date_str in history.dates("cleaned"):
+    date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    if date not in listed:
+        dated_files.append((date, None))
+dated_files.sort(key=lambda x: x[0])  # Sort by date
 
-    for prop_name in sorted(all_property_names):
-        prev_suites = prev_properties.get(prop_name, {}).get('suites', [])
-        curr_suites = curr_properties.get(prop_name, {}).get('suites', [])
+# Where the structured change events are written
+events_file = os.path.join(data_dir, "changes.jsonl")
 
-        prev_suite_numbers = {s['suite_number'] for s in prev_suites}
-        curr_suite_numbers = {s['suite_number'] for s in curr_suites}
 
-        added = curr_suite_numbers - prev_suite_numbers
-        removed = prev_suite_numbers - curr_suite_numbers
+def snapshot_path(date, file):
+    """The day's _cleaned.json, or its history record when file is None."""
+    return os.path.join(data_dir, file) if file else history.path(date.isoformat(), "cleaned")
 
-        if added:
-            for suite in sorted(added):
-                suite_data = next(s for s in curr_suites if s['suite_number'] == suite)
-                sqft = suite_data['sq_ft']
-                total_added_sqft += sqft
-                print(f"{prop_name} suite {suite} added ({sqft} sq ft)")
-        if removed:
-            for suite in sorted(removed):
-                suite_data = next(s for s in prev_suites if s['suite_number'] == suite)
-                sqft = suite_data['sq_ft']
-                total_removed_sqft += sqft
-                print(f"{prop_name} suite {suite} removed ({sqft} sq ft)")
 
-    net_change = total_removed_sqft - total_added_sqft
-    log(f"Net square footage change: {net_change} sq ft (positive indicates net leased)")
\ No newline at end of file
+def load_snapshot(store, ingested, date, file):
+    """One day's snapshot, from the store when the day is ingested and unchanged."""
+    path = snapshot_path(date, file)
+    if store and store.is_current(date.isoformat(), path, ingested):
+        return store.load_snapshot(date.isoformat())
+    if file is None:
+        return history.load(date.isoformat())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cached_diffs(cache, store, ingested):
+    """
+    Yield (prev_date, curr_date, events, summary) for consecutive days.
+
+    Pairs already in the cache are not loaded at all; a miss loads at most the two
+    snapshots involved, so a daily run only parses the newest file.
+    """
+    keys = [cache.file_key(snapshot_path(date, file)) for date, file in dated_files]
+    cache.prune(keys)
+    loaded = {}
+    for i in range(1, len(dated_files)):
+        prev_date, curr_date = dated_files[i-1][0], dated_files[i][0]
+        cached = cache.get(keys[i-1], keys[i])
+        if cached is None:
+            loaded = {j: loaded.get(j) or load_snapshot(store, ingested, *dated_files[j]) for j in (i-1, i)}
+            cached = diff_snapshots(prev_date, loaded[i-1], curr_date, loaded[i])
+            cache.put(keys[i-1], keys[i], *cached)
+        yield (prev_date, curr_date, *cached)
+
+
+parser = argparse.ArgumentParser(description="Compare consecutive cleaned snapshots.")
+parser.add_argument("--rebuild", action="store_true", help="ignore cached comparisons and recompute every day")
+args = parser.parse_args()
+
+store = VacancyStore() if os.path.exists(store_path) else None
+ingested = store.ingested() if store else {}
+cache = DiffCache(version=DIFF_VERSION)
+if args.rebuild:
+    cache.clear()
+writer = EventWriter(events_file)
+
+# Compare consecutive days, holding at most two snapshots at a time
+for prev_date, curr_date, events, summary in cached_diffs(cache, store, ingested):
+    log(f"Comparing {prev_date} to {curr_date}")
+    for event in events:
+        line = describe(event)
+        if line:
+            print(line)
+    writer.write(events)
+    writer.write([summary])
+    log(f"Net square footage change: {summary['net_sqft']} sq ft (positive indicates net leased)")
+
+writer.close()
+cache.close()
+if store:
+    store.close()
+log(f"Change events written to {events_file}")
@@ -1,409 +1,500 @@
 import os
-import json
 import time
-import re
+import queue
+import threading
+from collections import Counter
 from datetime import datetime
-from bs4 import BeautifulSoup
+from functools import partial
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
+from archive import PageArchive
+from browser import BLOCKING_PREFS, BrowserSession
+from fetch import USER_AGENT, create_session, fetch_page, rebase
+from history import SnapshotHistory
+from incremental import LISTING_FIELDS, carry_forward, load_latest_snapshot
+from journal import Journal, resume_from
+from listing_parser import parse_listing
+from pipeline import SnapshotWriter, count_suites
+from metrics import MetricsWriter, ParseProfiler, add_timings, print_summary, summarize
+from store import VacancyStore, store_path
+from suite_parser import parse_suites_detailed
+from waits import timed_phase, wait_for_availability
 
 # Set up Selenium
 chrome_options = Options()
 chrome_options.add_argument("--headless")  # Keep this for headless mode
-chrome_options.add_argument("user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36")
+chrome_options.add_argument(f"user-agent={USER_AGENT}")
 chrome_options.add_argument("--disable-blink-features=AutomationControlled")
 chrome_options.add_argument("--no-sandbox")  # Required for container environments
 chrome_options.add_argument("--disable-dev-shm-usage")  # Helps with memory issues in containers
 chrome_options.add_argument("--disable-gpu")  # Often needed in headless container setups
 
-driver = webdriver.Chrome(options=chrome_options)  # No Service needed; Chromedriver is in PATH
-driver.set_page_load_timeout(90)
-driver.set_window_size(1920, 1080)  # Set a larger window size for better loading in headless
+# Skip images, media, fonts and analytics in Chrome (see browser.py); only the DOM is scraped
+block_requests = True
+if block_requests:
+    chrome_options.add_experimental_option("prefs", BLOCKING_PREFS)
 
-# Dynamic date
-today = datetime.now().strftime("%Y-%m-%d")
-output_file = f"data/allied_{today}_updated.json"
+# Number of Chrome workers scraping detail pages in parallel (ALLIED_WORKERS overrides)
+num_workers = int(os.environ.get("ALLIED_WORKERS", 4))
 
-# Scrape properties from the website
-properties = []
-url = "https://alliedreit.com/properties/"
-print(f"Scraping properties list from {url}")
+# Try a plain HTTP fetch of each detail page before falling back to Chrome
+http_first = True
 
-# Load main page with retry
-for attempt in range(2):
-    try:
-        driver.get(url)
-        print("Page loaded")
-        time.sleep(5)
-        break
-    except TimeoutException:
-        print(f"Page load timeout, retrying ({attempt + 1}/2)...")
-        time.sleep(3)
-else:
-    print("Page load failed after retries")
-    driver.quit()
-    exit()
+# Incremental mode: only revisit detail pages whose listing data changed since the last
+# cleaned snapshot, or whose suites are older than max_age_days (ALLIED_INCREMENTAL=1)
+incremental = os.environ.get("ALLIED_INCREMENTAL") == "1"
+max_age_days = int(os.environ.get("ALLIED_MAX_AGE_DAYS", 7))
 
-# Cookie consent
-try:
-    wait = WebDriverWait(driver, 10)
-    accept_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".trustarc-acceptall-btn")))
-    accept_btn.click()
-    print("Cookies accepted")
-    time.sleep(3)
-except (TimeoutException, NoSuchElementException):
-    print("No cookie prompt or failed to accept")
-
-# Scroll to load all properties with dynamic scrolling
-last_height = driver.execute_script("return document.body.scrollHeight")
-while True:
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)
-    new_height = driver.execute_script("return document.body.scrollHeight")
-    if new_height == last_height:
-        break
-    last_height = new_height
-print("Scrolling complete")
-
-# Check for properties
-try:
-    wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.item")))
-    print("Properties detected")
-except TimeoutException:
-    print("No properties found. Logging source...")
-    with open("page_source.html", "w", encoding="utf-8") as f:
-        f.write(driver.page_source)
-    print("Page source saved to page_source.html")
-    driver.quit()
-    exit()
-
-# Parse page
-soup = BeautifulSoup(driver.page_source, 'html.parser')
-property_articles = soup.find_all('article', class_='item')
-print(f"Found {len(property_articles)} articles")
-
-for article in property_articles:
-    try:
-        # Name
-        name_elem = article.find('h2')
-        if not name_elem:
-            print("Skipping article: No name found")
-            continue
-        name = name_elem.text.strip()
-
-        # City
-        city_elem = article.find('p', class_='paragraph-2 uppercase bold')
-        city = city_elem.text.strip() if city_elem else ""
-        if ',' in city:
-            city = city.split(',')[-1].strip()
-        if not city:
-            print(f"Warning: Empty city for {name}")
-
-        # Total GLA
-        total_gla = 0
-        gla_elem = article.find('p', class_='body', string=re.compile(r'\d+\s*SQ\.\s*FT\.\s*total GLA'))
-        if gla_elem:
-            gla_match = re.search(r'(\d{1,3}(,\d{3})*)', gla_elem.text.strip())
-            if gla_match:
-                total_gla = int(gla_match.group(1).replace(',', ''))
-        else:
-            # Fallback for variations
-            gla_fallback = article.find(string=re.compile(r'\d+\s*(square feet|SQ\. FT\.)'))
-            if gla_fallback:
-                gla_match = re.search(r'(\d{1,3}(,\d{3})*)', gla_fallback.strip())
-                if gla_match:
-                    total_gla = int(gla_match.group(1).replace(',', ''))
-                    print(f"Fallback GLA used for {name}: {total_gla}")
-        if total_gla == 0:
-            print(f"Warning: Empty total_gla for {name}")
-
-        # Available suites
-        available_suites = 0
-        suites_elem = article.find('p', class_='body', string=re.compile(r'Suites available: \d+'))
-        if suites_elem:
-            suites_match = re.search(r'Suites available: (\d+)', suites_elem.text.strip())
-            if suites_match:
-                available_suites = int(suites_match.group(1))
-        else:
-            print(f"Warning: No suites found for {name}")
-
-        # Link
-        link_elem = article.find('a')
-        link = link_elem['href'] if link_elem else ""
-        if link and not link.startswith('http'):
-            link = f"https://alliedreit.com{link}"
-        if not link:
-            print(f"Warning: Empty link for {name}")
-
-        property_data = {
-            "name": name,
-            "city": city,
-            "total_gla": total_gla,
-            "available_suites": available_suites,
-            "link": link
-        }
-
-        properties.append(property_data)
-
-    except Exception as e:
-        print(f"Error processing article for {name or 'unknown'}: {e}")
-
-total_scraped = len(properties)
-print(f"Total scraped: {total_scraped}")
-
-updated_properties = []
-skipped = []
-
-# Re-initialize driver for individual property scraping if needed
-driver.quit()
-driver = webdriver.Chrome(options=chrome_options)
-driver.set_page_load_timeout(90)
-driver.set_window_size(1920, 1080)
-
-# Optional: Save after each property (set to False or comment out to disable)
-save_after_each = True
-for prop in properties:
-    updated_prop = prop.copy()
-    if prop['available_suites'] > 0:
-        link = prop['link']
-        print(f"Scraping suites for {prop['name']} at {link}")
-        for attempt in range(2):  # Retry once
-            try:
-                driver.get(link)
-                wait = WebDriverWait(driver, 20)  # Increased wait time
-                # Handle cookie prompt on detail page
-                try:
-                    accept_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".trustarc-acceptall-btn")))
-                    accept_btn.click()
-                    print(f"Cookie prompt accepted on detail page for {prop['name']}")
-                except (TimeoutException, NoSuchElementException):
-                    print(f"No cookie prompt on detail page for {prop['name']}")
-                wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-
-                # Scroll the detail page to load any lazy content
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(8)  # Slight increase
-
-                # Try to expand table rows if present
-                try:
-                    table = driver.find_element(By.TAG_NAME, 'table')
-                    rows = table.find_elements(By.TAG_NAME, 'tr')
-                    for row in rows:
-                        try:
-                            row.click()
-                            time.sleep(1)
-                        except Exception:
-                            pass
-                except Exception:
-                    print(f"No table to expand for {prop['name']}")
-
-                time.sleep(30)  # Increased wait for JS and to avoid stalls
-                detail_soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-                suites = []
-                available_sqft = 0
-
-                # Find availability section
-                avail_h2 = detail_soup.find('h2', string=re.compile(r'Availability', re.I))
-                if avail_h2:
-                    # Try table parsing first
-                    table = avail_h2.find_next('table')
-                    if table:
-                        rows = table.find_all('tr')
-                        i = 0
-                        while i < len(rows):
-                            row = rows[i]
-                            tds = row.find_all('td')
-                            if len(tds) >= 4:
-                                suite = {}
-                                suite_number_str = tds[0].text.strip()
-                                suite['suite_number'] = re.sub(r'^[v^]\s*', '', suite_number_str)
-                                suite['type'] = tds[1].text.strip()
-                                size_str = tds[2].text.strip().replace(' SF', '').replace(',', '')
-                                suite['sq_ft'] = int(size_str) if size_str.isdigit() else 0
-                                available_sqft += suite['sq_ft']
-                                suite['availability'] = tds[3].text.strip()
-                                suite['net_rent'] = 'Unknown'
-                                suite['additional_rent'] = 'Unknown'
-                                # Check if next row is expanded
-                                i += 1
-                                if i < len(rows) and len(rows[i].find_all('td')) == 1:
-                                    expanded_td = rows[i].find('td')
-                                    p_elems = expanded_td.find_all('p')
-                                    details = {}
-                                    for j in range(0, len(p_elems), 2):
-                                        if j+1 < len(p_elems):
-                                            label = p_elems[j].text.strip().rstrip(':').lower()
-                                            value = p_elems[j+1].text.strip()
-                                            if label == 'net rent':
-                                                suite['net_rent'] = value
-                                            if label == 'additional rent':
-                                                suite['additional_rent'] = value
-                                    i += 1
-                                else:
-                                    i -= 1  # No expanded, adjust back
-                                if suite['sq_ft'] > 0:
-                                    suites.append(suite)
-                            else:
-                                i += 1
-                    else:
-                        # Fall back to h3/p with class logic
-                        h3_elems = avail_h2.find_all_next('h3', class_='number')
-                        if h3_elems:
-                            for h3 in h3_elems:
-                                suite = {}
-                                suite['suite_number'] = h3.text.strip()
-                                suite_div = h3.find_parent('div')
-                                p_type = suite_div.find('p', class_='type')
-                                suite['type'] = p_type.text.strip() if p_type else 'Unknown'
-                                p_size = suite_div.find('p', class_='size')
-                                size_value = p_size.text.strip() if p_size else '0 SF'
-                                sq_ft_str = re.sub(r'[^\d]', '', size_value.split(' ')[0])
-                                sq_ft = int(sq_ft_str) if sq_ft_str.isdigit() else 0
-                                suite['sq_ft'] = sq_ft
-                                if sq_ft > 0:
-                                    available_sqft += sq_ft
-                                p_avail = suite_div.find('p', class_='avail')
-                                suite['availability'] = p_avail.text.strip() if p_avail else 'Unknown'
-                                # Guess for net rent and additional rent classes
-                                p_net = suite_div.find('p', class_='net') or suite_div.find('p', class_='rent') or suite_div.find('p', string=re.compile(r'Net Rent:\s*', re.I))
-                                suite['net_rent'] = p_net.text.strip() if p_net else 'Unknown'
-                                p_additional = suite_div.find('p', class_='additional') or suite_div.find('p', class_='additional-rent') or suite_div.find('p', string=re.compile(r'Additional Rent:\s*', re.I))
-                                suite['additional_rent'] = p_additional.text.strip() if p_additional else 'Unknown'
-                                suites.append(suite)
-                        else:
-                            # Fall back to h4 label logic if no h3 with class 'number'
-                            h3_elems = avail_h2.find_all_next('h3')
-                            first_h3 = h3_elems[0] if h3_elems else None
-
-                            if first_h3 and 'suite #' in first_h3.text.lower():
-                                # Generic suites, multiple groups by Type h4
-                                type_h4s = avail_h2.find_all_next('h4', string=re.compile(r'^Type$', re.I))
-                                for idx, type_h4 in enumerate(type_h4s, start=1):
-                                    suite = {}
-                                    suite['suite_number'] = f"Suite {idx}"
-                                    details = {}
-                                    current = type_h4
-                                    while current:
-                                        if current.name == 'h4':
-                                            label = current.text.strip().rstrip(':').lower()
-                                            value_elem = current.find_next_sibling('p')
-                                            value = value_elem.text.strip() if value_elem else ''
-                                            details[label] = value
-                                        next_elem = current.find_next('h4')
-                                        if next_elem and next_elem.text.strip().lower() == 'type':
-                                            break
-                                        current = next_elem
-                                    if 'size' in details:
-                                        suite['type'] = details.get('type', 'Unknown')
-                                        size_value = details.get('size', '0 SF')
-                                        sq_ft_str = re.sub(r'[^\d]', '', size_value.split(' ')[0])
-                                        sq_ft = int(sq_ft_str) if sq_ft_str.isdigit() else 0
-                                        suite['sq_ft'] = sq_ft
-                                        if sq_ft > 0:
-                                            available_sqft += sq_ft
-                                        suite['availability'] = details.get('availability', 'Unknown')
-                                        suite['net_rent'] = details.get('net rent', 'Unknown')
-                                        suite['additional_rent'] = details.get('additional rent', 'Unknown')
-                                        suites.append(suite)
-                            else:
-                                # Specific suite numbers with h3
-                                for i, h3 in enumerate(h3_elems):
-                                    suite = {}
-                                    suite['suite_number'] = h3.text.strip()
-                                    details = {}
-                                    next_h3 = h3_elems[i+1] if i+1 < len(h3_elems) else None
-                                    current = h3.find_next('h4')
-                                    while current and (not next_h3 or current < next_h3):
-                                        label = current.text.strip().rstrip(':').lower()
-                                        value_elem = current.find_next_sibling('p')
-                                        value = value_elem.text.strip() if value_elem else ''
-                                        details[label] = value
-                                        current = current.find_next('h4')
-                                    if 'size' in details:
-                                        suite['type'] = details.get('type', 'Unknown')
-                                        size_value = details.get('size', '0 SF')
-                                        sq_ft_str = re.sub(r'[^\d]', '', size_value.split(' ')[0])
-                                        sq_ft = int(sq_ft_str) if sq_ft_str.isdigit() else 0
-                                        suite['sq_ft'] = sq_ft
-                                        if sq_ft > 0:
-                                            available_sqft += sq_ft
-                                        suite['availability'] = details.get('availability', 'Unknown')
-                                        suite['net_rent'] = details.get('net rent', 'Unknown')
-                                        suite['additional_rent'] = details.get('additional rent', 'Unknown')
-                                        suites.append(suite)
-                else:
-                    print(f"No availability section found for {prop['name']}.")
-
-                # Verify
-                if len(suites) != prop['available_suites']:
-                    print(f"Warning: Suite count mismatch for {prop['name']}: JSON says {prop['available_suites']}, found {len(suites)}")
-                if available_sqft == 0 and suites:
-                    print(f"Warning: Zero available_sqft for {prop['name']} despite {len(suites)} suites")
-
-                updated_prop['available_sqft'] = available_sqft
-                updated_prop['suites'] = suites
-                print(f"Added {len(suites)} suites for {prop['name']}, total sqft: {available_sqft}")
-                break
+# Attempts per property before it is recorded as skipped
+max_attempts = 2
 
-            except Exception as e:
-                print(f"Error scraping suites for {prop['name']} (attempt {attempt + 1}/2): {str(e)}")
-                if attempt == 1:
-                    skipped.append({"name": prop['name'], "link": link, "reason": str(e)})
-                    updated_prop['available_sqft'] = 0
-                    updated_prop['suites'] = []
-                    print(f"Skipped {prop['name']} after retries")
-                time.sleep(5)  # Increased retry delay
-    else:
-        updated_prop['available_sqft'] = 0
-        updated_prop['suites'] = []
+# Per-phase timeouts (seconds) for the detail scrape; each phase returns as soon as the page is ready
+phase_timeouts = {
+    "cookie": 5,          # TrustArc banner, only shown on a session's first page
+    "availability": 20,   # Availability h2 present and rows stable after scrolling
+    "settle": 10,         # Expanded rows stop changing after clicking
+}
 
-    updated_properties.append(updated_prop)
+# The Availability heading on detail pages
+AVAILABILITY_XPATH = "//h2[contains(translate(., 'AVILBTY', 'avilbty'), 'availability')]"
 
-    # Optionally save after each property
-    if save_after_each:
-        updated_data = {
-            "date": today,
-            "properties": updated_properties
-        }
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_data, f, indent=4)
-        print(f"Intermediate JSON saved to {output_file} after processing {prop['name']}")
+# Keep every rendered listing and detail page in the raw archive (see archive.py)
+archive_pages = True
 
-driver.quit()
+# fsync the per-run checkpoint journal after this many finished properties
+journal_fsync_every = 10
 
-updated_data = {
-    "date": today,
-    "properties": updated_properties,
-    "skipped_properties": data.get('skipped_properties', []) + skipped
-}
+# Profile every detail-page parse with cProfile (ALLIED_PROFILE_PARSE=1); the merged
+# stats are written next to the snapshot as allied_<date>_parse.prof
+parse_profiler = ParseProfiler() if os.environ.get("ALLIED_PROFILE_PARSE") == "1" else None
+
+# Also add each day's snapshot files to the delta-encoded history (ALLIED_HISTORY=1, see history.py)
+keep_history = os.environ.get("ALLIED_HISTORY") == "1"
 
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(updated_data, f, indent=4)
 
-input_file = f"data/allied_{today}_updated.json"
-output_file = f"data/allied_{today}_cleaned.json"
+def create_driver():
+    driver = webdriver.Chrome(options=chrome_options)  # No Service needed; Chromedriver is in PATH
+    driver.set_page_load_timeout(90)
+    driver.set_window_size(1920, 1080)  # Set a larger window size for better loading in headless
+    return driver
 
-# Load the JSON
-with open(input_file, 'r', encoding='utf-8') as f:
-    data = json.load(f)
 
-# Process each property
-for prop in data.get('properties', []):
-    if 'suites' in prop:
-        # Filter out suites where suite_number is "Suite #"
-        prop['suites'] = [suite for suite in prop['suites'] if suite.get('suite_number') != 'Suite #']
+def scrape_listing(browser, url, save_page=None):
+    """
+    Load the properties page and return its properties, or None if the page never rendered.
 
-# Save the cleaned JSON
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(data, f, indent=4)
+    browser is a BrowserSession; accepting the cookie banner here covers the detail pages
+    it loads afterwards. save_page(key, html), when given, receives the rendered page for
+    the raw archive.
+    """
+    print(f"Scraping properties list from {url}")
+    driver = browser.driver
 
-print(f"Cleaned JSON saved to {output_file}")
+    # Load main page with retry
+    for attempt in range(2):
+        try:
+            driver.get(rebase(url))
+            print("Page loaded")
+            time.sleep(5)
+            break
+        except TimeoutException:
+            print(f"Page load timeout, retrying ({attempt + 1}/2)...")
+            time.sleep(3)
+    else:
+        print("Page load failed after retries")
+        return None
 
-print(f"Updated JSON saved to {output_file}")
+    # Cookie consent
+    wait = WebDriverWait(driver, 10)
+    if browser.accept_cookies(10):
+        print("Cookies accepted")
+        time.sleep(3)
+    else:
+        print("No cookie prompt or failed to accept")
+
+    # Scroll to load all properties with dynamic scrolling
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    while True:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(2)
+        new_height = driver.execute_script("return document.body.scrollHeight")
+        if new_height == last_height:
+            break
+        last_height = new_height
+    print("Scrolling complete")
+
+    # Check for properties
+    try:
+        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.item")))
+        print("Properties detected")
+    except TimeoutException:
+        print("No properties found. Logging source...")
+        with open("page_source.html", "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        print("Page source saved to page_source.html")
+        return None
+
+    page_source = driver.page_source
+    if save_page:
+        save_page('listing', page_source)
+    return parse_listing(page_source)
+
+
+def parse_page(html):
+    """parse_suites_detailed, under the parse profiler when it is enabled."""
+    if parse_profiler is not None:
+        return parse_profiler.run(parse_suites_detailed, html)
+    return parse_suites_detailed(html)
+
+
+def scrape_suites(browser, prop, save_page=None, metrics=None):
+    """
+    Load one detail page in a BrowserSession, expand its rows and return (suites, available_sqft).
+
+    metrics, when given, gets the per-phase seconds added to metrics['timings'] and the
+    matched layout in metrics['strategy'].
+    """
+    timings = {}
+    driver = browser.driver
+    with timed_phase(timings, 'load'):
+        driver.get(rebase(prop['link']))
+
+    # Handle the cookie prompt once per session; stop waiting as soon as the page content shows up
+    with timed_phase(timings, 'cookie'):
+        if browser.accept_cookies(phase_timeouts['cookie'], (By.XPATH, AVAILABILITY_XPATH)):
+            print(f"Cookie prompt accepted on detail page for {prop['name']}")
+
+    # Scroll the detail page to load any lazy content
+    with timed_phase(timings, 'scroll'):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    with timed_phase(timings, 'availability'):
+        state, settled = wait_for_availability(driver, phase_timeouts['availability'])
+        if not settled:
+            print(f"Availability section not stable after {phase_timeouts['availability']}s for {prop['name']}")
+
+    # Try to expand table rows if present
+    with timed_phase(timings, 'expand'):
+        if state and state[0]:
+            rows = driver.find_elements(By.XPATH, AVAILABILITY_XPATH + "/following::table[1]//tr")
+            for row in rows:
+                try:
+                    row.click()
+                except Exception:
+                    pass
+        else:
+            print(f"No table to expand for {prop['name']}")
+
+    # Wait until the expanded rows stop appearing
+    with timed_phase(timings, 'settle'):
+        state, settled = wait_for_availability(driver, phase_timeouts['settle'])
+        if not settled:
+            print(f"Rows still changing after {phase_timeouts['settle']}s for {prop['name']}")
+
+    page_source = driver.page_source
+    if save_page:
+        save_page(prop['link'], page_source)
+    with timed_phase(timings, 'parse'):
+        suites, available_sqft, strategy = parse_page(page_source)
+    if metrics is not None:
+        add_timings(metrics.setdefault('timings', {}), timings)
+        metrics['strategy'] = strategy
+    if strategy is None:
+        print(f"No availability section found for {prop['name']}.")
+    else:
+        print(f"Parsed {prop['name']} with the {strategy} layout")
+
+    print(f"Timings for {prop['name']}: " + ", ".join(f"{phase} {seconds}s" for phase, seconds in timings.items()))
+
+    # Verify (header rows are only dropped when the snapshot is cleaned)
+    found = count_suites(suites)
+    if found != prop['available_suites']:
+        print(f"Warning: Suite count mismatch for {prop['name']}: JSON says {prop['available_suites']}, found {found}")
+    if available_sqft == 0 and suites:
+        print(f"Warning: Zero available_sqft for {prop['name']} despite {len(suites)} suites")
+
+    return suites, available_sqft
+
+
+def fetch_suites_http(session, prop, save_page=None, metrics=None):
+    """
+    Parse suites from the server-rendered detail page.
+
+    Returns (suites, available_sqft), or None when the page has no suites or disagrees
+    with the listing's available_suites and Chrome is needed. metrics is filled in as
+    for scrape_suites, with 'fetch' and 'parse' phases.
+    """
+    timings = {}
+    with timed_phase(timings, 'fetch'):
+        html = fetch_page(session, prop['link'])
+    if metrics is not None:
+        add_timings(metrics.setdefault('timings', {}), timings)
+    if html is None:
+        return None
+    if save_page:
+        save_page(prop['link'], html)
+    with timed_phase(timings, 'parse'):
+        suites, available_sqft, strategy = parse_page(html)
+    if metrics is not None:
+        add_timings(metrics['timings'], {'parse': timings['parse']})
+        metrics['strategy'] = strategy
+    if not suites:
+        return None
+    found = count_suites(suites)
+    if found != prop['available_suites']:
+        print(f"HTTP found {found} suites for {prop['name']}, listing says {prop['available_suites']}; falling back to Chrome")
+        return None
+    return suites, available_sqft
+
+
+def scrape_property(prop, session=None, browser=None, save_page=None, metrics=None):
+    """
+    Scrape one property, over HTTP when possible and with Chrome otherwise.
+
+    browser is a BrowserSession, whose Chrome only starts when it is needed; save_page(key, html) archives
+    every detail page that gets parsed. metrics, when given, collects per-phase
+    'timings', the matched 'strategy' and the Chrome 'attempts'.
+    Returns (updated_prop, skipped entry or None, path), path being one of
+    'none' (no suites listed), 'http', 'selenium' or 'skipped'.
+    """
+    updated_prop = prop.copy()
+    if prop['available_suites'] <= 0:
+        updated_prop['available_sqft'] = 0
+        updated_prop['suites'] = []
+        return updated_prop, None, 'none'
+
+    link = prop['link']
+    if http_first and session is not None:
+        try:
+            result = fetch_suites_http(session, prop, save_page, metrics)
+        except Exception as e:
+            # The server-rendered page may differ from what Chrome renders; let Chrome try
+            print(f"HTTP scrape failed for {prop['name']}: {e}; falling back to Chrome")
+            result = None
+        if result is not None:
+            suites, available_sqft = result
+            updated_prop['available_sqft'] = available_sqft
+            updated_prop['suites'] = suites
+            print(f"Added {len(suites)} suites for {prop['name']} over HTTP, total sqft: {available_sqft}")
+            return updated_prop, None, 'http'
+
+    print(f"Scraping suites for {prop['name']} at {link}")
+    error = None
+    for attempt in range(max_attempts):
+        if metrics is not None:
+            metrics['attempts'] = attempt + 1
+        try:
+            suites, available_sqft = scrape_suites(browser, prop, save_page, metrics)
+            updated_prop['available_sqft'] = available_sqft
+            updated_prop['suites'] = suites
+            print(f"Added {len(suites)} suites for {prop['name']}, total sqft: {available_sqft}")
+            return updated_prop, None, 'selenium'
+        except Exception as e:
+            error = e
+            print(f"Error scraping suites for {prop['name']} (attempt {attempt + 1}/{max_attempts}): {str(e)}")
+            time.sleep(5)  # Increased retry delay
+
+    updated_prop['available_sqft'] = 0
+    updated_prop['suites'] = []
+    print(f"Skipped {prop['name']} after retries")
+    return updated_prop, {"name": prop['name'], "link": link, "reason": str(error)}, 'skipped'
+
+
+def detail_worker(worker_id, tasks, results, save_page=None, record_metrics=None, browser=None):
+    """
+    Pull (index, prop) tasks off the shared queue and scrape them.
+
+    Each worker has its own HTTP session and its own browser session, which is reused
+    for every page and only starts Chrome the first time a property needs it; browser
+    hands over one that is already running. record_metrics(record) receives one timing
+    record per property.
+    """
+    session = create_session()
+
+    def start_chrome():
+        print(f"Worker {worker_id} starting Chrome")
+        return create_driver()
+
+    browser = browser or BrowserSession(start_chrome, block_requests)
 
+    try:
+        while True:
+            try:
+                index, prop = tasks.get_nowait()
+            except queue.Empty:
+                break
+            metrics = {'timings': {}, 'attempts': 0, 'strategy': None}
+            start = time.monotonic()
+            try:
+                updated_prop, skip, path = scrape_property(prop, session, browser, save_page, metrics)
+            except Exception as e:
+                # Never lose a task: a crash here becomes a skipped property
+                updated_prop = dict(prop, available_sqft=0, suites=[])
+                skip = {"name": prop['name'], "link": prop['link'], "reason": str(e)}
+                path = 'skipped'
+            if record_metrics:
+                record_metrics({
+                    "name": prop['name'], "link": prop['link'], "worker": worker_id, "path": path,
+                    "seconds": round(time.monotonic() - start, 2), "attempts": metrics['attempts'],
+                    "strategy": metrics['strategy'], "listing_suites": prop['available_suites'],
+                    "suites": count_suites(updated_prop['suites']), "timings": metrics['timings'],
+                })
+            results.put((index, updated_prop, skip, path))
+    finally:
+        session.close()
+        browser.quit()
+
+
+def scrape_properties(properties, workers=None, on_result=None, finished=None, save_page=None, record_metrics=None,
+                      browser=None, emit=None):
+    """
+    Scrape detail pages with a pool of workers (HTTP first, Chrome as needed).
+
+    finished maps listing indexes to (updated_prop, path) for properties that are already
+    complete (carried forward or resumed) and are not revisited.
+    on_result(updated_prop, skipped entry or None) is called for every other property as
+    soon as it finishes, in completion order. save_page(key, html) archives raw pages,
+    and record_metrics(record) gets a timing record for every detail page scraped.
+    browser, a BrowserSession left over from the listing page, is reused by the first worker.
+    Results are merged back in listing order, so the output matches a sequential run;
+    emit(updated_prop) streams them out in that order as soon as every earlier one is done.
+    Returns (updated_properties, skipped).
+    """
+    workers = max(1, workers or num_workers)
+    slots = [None] * len(properties)
+    tasks = queue.Queue()
+    results = queue.Queue()
+
+    finished = finished or {}
+    for index, prop in enumerate(properties):
+        if index in finished:
+            results.put((index, finished[index][0], None, finished[index][1]))
+        elif prop['available_suites'] > 0:
+            tasks.put((index, prop))
+        else:
+            results.put((index, *scrape_property(prop)))
+
+    pending = tasks.qsize()
+    threads = [
+        threading.Thread(target=detail_worker, daemon=True,
+                         args=(n + 1, tasks, results, save_page, record_metrics, browser if n == 0 else None))
+        for n in range(min(workers, pending))
+    ]
+    print(f"Scraping {pending} detail pages with {len(threads)} workers")
+    for thread in threads:
+        thread.start()
+
+    paths = Counter()
+    done = 0
+    emitted = 0
+    while done < len(properties):
+        try:
+            index, updated_prop, skip, path = results.get(timeout=1)
+        except queue.Empty:
+            if any(thread.is_alive() for thread in threads):
+                continue
+            # Every worker is gone (e.g. Chrome failed to start); give up on what is left
+            while not tasks.empty():
+                index, prop = tasks.get_nowait()
+                results.put((index, dict(prop, available_sqft=0, suites=[]),
+                             {"name": prop['name'], "link": prop['link'], "reason": "No worker available"}, 'skipped'))
+            continue
+        slots[index] = (updated_prop, skip)
+        paths[path] += 1
+        done += 1
+        if on_result and index not in finished:
+            on_result(updated_prop, skip)
+        while emitted < len(slots) and slots[emitted] is not None:
+            if emit:
+                emit(slots[emitted][0])
+            emitted += 1
+
+    for thread in threads:
+        thread.join()
+
+    print(f"Fetch paths: {paths['http']} over HTTP, {paths['selenium']} with Chrome, "
+          f"{paths['skipped']} skipped, {paths['none']} without suites, {paths['carried']} carried forward, "
+          f"{paths['resumed']} resumed")
+
+    updated_properties = [slot[0] for slot in slots]
+    skipped = [slot[1] for slot in slots if slot[1] is not None]
+    return updated_properties, skipped
+
+
+def main():
+    # Dynamic date
+    today = datetime.now().strftime("%Y-%m-%d")
+    updated_file = f"data/allied_{today}_updated.json"
+    cleaned_file = f"data/allied_{today}_cleaned.json"
+
+    # Scrape properties from the website
+    url = "https://alliedreit.com/properties/"
+    save_page = partial(PageArchive().store, today) if archive_pages else None
+    # One browser session for the listing and the first detail worker
+    browser = BrowserSession(create_driver, block_requests)
+    properties = scrape_listing(browser, url, save_page)
+    if properties is None:
+        browser.quit()
+        exit()
+
+    total_scraped = len(properties)
+    print(f"Total scraped: {total_scraped}")
+
+    # Replay the checkpoint journal of an interrupted run of the same day
+    journal = Journal(f"data/allied_{today}_journal.jsonl", journal_fsync_every)
+    finished = {}
+    records = journal.replay()
+    if records:
+        resumed = resume_from(records, properties, ("name",) + LISTING_FIELDS)
+        print(f"Resuming from {journal.path}: {len(resumed)} properties already done")
+        finished.update((index, (prop, 'resumed')) for index, prop in resumed.items())
+
+    if incremental:
+        run_date = datetime.strptime(today, "%Y-%m-%d").date()
+        previous_date, previous = load_latest_snapshot("data", run_date)
+        if previous is None:
+            print("Incremental mode: no previous cleaned snapshot, scraping everything")
+        else:
+            carried = carry_forward(properties, previous, previous_date, run_date, max_age_days)
+            print(f"Incremental mode: carrying {len(carried)} properties forward from {previous_date}")
+            for index, prop in carried.items():
+                finished.setdefault(index, (prop, 'carried'))
+
+    # Both snapshot files are written property by property, in listing order, as results come in
+    writer = SnapshotWriter(today, updated_file, cleaned_file)
+    resumed_names = [prop['name'] for prop, path in finished.values() if path == 'resumed']
+    metrics = MetricsWriter(f"data/allied_{today}_metrics.jsonl", resumed_names)
+    _, skipped = scrape_properties(properties, num_workers, journal.append, finished, save_page,
+                                   metrics.write, browser, writer.write)
+    browser.quit()  # Only still running when no detail page needed a worker
+    journal.close()
+    metrics.close()
+    print_summary(summarize(metrics.records))
+    print(f"Per-property metrics saved to {metrics.path}")
+    if parse_profiler is not None:
+        print(parse_profiler.dump(f"data/allied_{today}_parse.prof"))
+
+    writer.close(skipped)
+    print(f"Updated JSON saved to {updated_file}")
+    print(f"Cleaned JSON saved to {cleaned_file}")
+
+    store = VacancyStore()
+    store.ingest_file(today, cleaned_file)
+    store.close()
+    print(f"Ingested {cleaned_file} into {store_path}")
+
+    if keep_history:
+        history = SnapshotHistory()
+        history.add_file(updated_file)
+        history.add_file(cleaned_file)
+        print(f"Added {today} to the snapshot history in {history.root}")
+
+    journal.remove()
+
+
+if __name__ == "__main__":
+    main()
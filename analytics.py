@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+from store import VacancyStore, cleaned_files, store_path
+
+# Upper bounds (sq ft) of the size buckets used in rollups; the last bucket is open-ended
+SIZE_BUCKETS = (2500, 5000, 10000, 25000)
+
+
+def size_bucket_labels():
+    edges = (0,) + SIZE_BUCKETS
+    labels = [f"{lo:,}-{hi:,}" for lo, hi in zip(edges, edges[1:])]
+    return labels + [f"{SIZE_BUCKETS[-1]:,}+"]
+
+
+class SuiteHistory:
+    """
+    Presence of every (property, suite_number) key across all snapshot dates.
+
+    Built from columnar observations into a keys x dates boolean matrix, so interval
+    detection and rollups are NumPy operations over the whole history at once.
+    Gaps are counted on the snapshot axis: a day with no snapshot is not a gap.
+    """
+
+    def __init__(self, dates, keys, key_idx, date_idx, sq_ft, cities, types):
+        # dates: sorted YYYY-MM-DD strings; keys: [(property, suite_number)];
+        # key_idx/date_idx/sq_ft: one entry per observation; cities/types: per-key labels
+        self.dates = np.array(dates, dtype='datetime64[D]')
+        self.keys = keys
+        self.key_lookup = {key: i for i, key in enumerate(keys)}
+        self.cities = np.array(cities, dtype=object)
+        self.types = np.array(types, dtype=object)
+
+        self.presence = np.zeros((len(keys), len(dates)), dtype=bool)
+        self.presence[key_idx, date_idx] = True
+
+        # Size as of each key's latest observation
+        order = np.lexsort((date_idx, key_idx))
+        last = np.r_[key_idx[order][1:] != key_idx[order][:-1], True]
+        self.sq_ft = np.zeros(len(keys), dtype=np.int64)
+        self.sq_ft[key_idx[order][last]] = sq_ft[order][last]
+
+        self._intervals = None
+
+    @classmethod
+    def from_store(cls, store):
+        """Load from a VacancyStore (see store.py)."""
+        rows = store.conn.execute(
+            "SELECT s.date, p.name, s.suite_number, s.sq_ft, c.name, t.name "
+            "FROM suites s JOIN properties p ON p.id = s.property_id "
+            "JOIN property_days d ON d.date = s.date AND d.property_id = s.property_id "
+            "LEFT JOIN cities c ON c.id = d.city_id LEFT JOIN suite_types t ON t.id = s.type_id "
+            "ORDER BY s.date").fetchall()
+        dates = [row[0] for row in store.conn.execute("SELECT date FROM snapshots ORDER BY date")]
+        return cls.from_rows(dates, rows)
+
+    @classmethod
+    def from_json(cls, data_dir):
+        """Load straight from the _cleaned.json files in data_dir."""
+        dates = []
+        rows = []
+        for date, f in cleaned_files(data_dir):
+            dates.append(date)
+            with open(os.path.join(data_dir, f), 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            for prop in data.get('properties', []):
+                for suite in prop.get('suites', []):
+                    rows.append((date, prop['name'], suite['suite_number'], suite['sq_ft'],
+                                 prop.get('city'), suite.get('type')))
+        return cls.from_rows(dates, rows)
+
+    @classmethod
+    def from_rows(cls, dates, rows):
+        """rows: (date, property, suite_number, sq_ft, city, type), ordered by date."""
+        date_lookup = {date: i for i, date in enumerate(dates)}
+        keys = []
+        key_lookup = {}
+        cities = []
+        types = []
+        key_idx = np.empty(len(rows), dtype=np.int64)
+        date_idx = np.empty(len(rows), dtype=np.int64)
+        sq_ft = np.empty(len(rows), dtype=np.int64)
+        for n, (date, name, number, size, city, suite_type) in enumerate(rows):
+            key = (name, number)
+            i = key_lookup.get(key)
+            if i is None:
+                i = key_lookup[key] = len(keys)
+                keys.append(key)
+                cities.append(city)
+                types.append(suite_type)
+            else:
+                # Rows are date ordered, so the latest city and type win
+                cities[i] = city
+                types[i] = suite_type
+            key_idx[n] = i
+            date_idx[n] = date_lookup[date]
+            sq_ft[n] = size or 0
+        return cls(dates, keys, key_idx, date_idx, sq_ft, cities, types)
+
+    def intervals(self):
+        """
+        Listing intervals as a dict of parallel arrays.
+
+        key: key index; start/end: first and last snapshot index of the run;
+        first_seen/last_seen: their dates; days: last_seen - first_seen;
+        removed_on: first snapshot date without the suite (NaT while still listed).
+        """
+        if self._intervals is None:
+            padded = np.pad(self.presence.astype(np.int8), ((0, 0), (1, 1)))
+            steps = np.diff(padded, axis=1)
+            key, start = np.nonzero(steps == 1)
+            _, stop = np.nonzero(steps == -1)
+            end = stop - 1
+            removed_on = np.full(len(end), np.datetime64('NaT'), dtype='datetime64[D]')
+            gone = stop < len(self.dates)
+            removed_on[gone] = self.dates[stop[gone]]
+            self._intervals = {
+                "key": key,
+                "start": start,
+                "end": end,
+                "first_seen": self.dates[start],
+                "last_seen": self.dates[end],
+                "days": (self.dates[end] - self.dates[start]).astype(np.int64),
+                "removed_on": removed_on,
+            }
+        return self._intervals
+
+    def suite(self, property_name, suite_number):
+        """Intervals and totals for one suite, or None if it was never listed."""
+        i = self.key_lookup.get((property_name, suite_number))
+        if i is None:
+            return None
+        intervals = self.intervals()
+        mine = intervals["key"] == i
+        periods = [
+            {"first_seen": str(first), "last_seen": str(last),
+             "removed_on": None if np.isnat(removed) else str(removed)}
+            for first, last, removed in zip(intervals["first_seen"][mine], intervals["last_seen"][mine],
+                                            intervals["removed_on"][mine])
+        ]
+        return {
+            "property": property_name,
+            "suite_number": suite_number,
+            "city": self.cities[i],
+            "type": self.types[i],
+            "sq_ft": int(self.sq_ft[i]),
+            "first_seen": periods[0]["first_seen"],
+            "last_seen": periods[-1]["last_seen"],
+            "still_listed": periods[-1]["removed_on"] is None,
+            "days_listed": int(intervals["days"][mine].sum()),
+            "snapshots_listed": int(self.presence[i].sum()),
+            "gaps": len(periods) - 1,
+            "periods": periods,
+        }
+
+    def group_labels(self, by):
+        """Per-key labels for a rollup dimension: 'city', 'type' or 'size'."""
+        if by == 'city':
+            return self.cities
+        if by == 'type':
+            return self.types
+        if by == 'size':
+            return np.array(size_bucket_labels(), dtype=object)[np.digitize(self.sq_ft, SIZE_BUCKETS)]
+        raise ValueError(f"Unknown rollup dimension: {by}")
+
+    def rollup(self, by=('city', 'type'), leased_only=False):
+        """
+        Days on market per group: [(group labels, intervals, median days, mean days, sq ft)].
+
+        With leased_only, only intervals that ended (the suite came off the market) count.
+        """
+        intervals = self.intervals()
+        keep = ~np.isnat(intervals["removed_on"]) if leased_only else np.ones(len(intervals["key"]), dtype=bool)
+        key = intervals["key"][keep]
+        days = intervals["days"][keep]
+        labels = [self.group_labels(dimension)[key].astype(str) for dimension in by]
+        if not len(key):
+            return []
+        combined = np.array(['\x1f'.join(parts) for parts in zip(*labels)], dtype=object)
+        groups, inverse = np.unique(combined, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(groups) + 1))
+        sq_ft = self.sq_ft[key]
+        result = []
+        for g, group in enumerate(groups):
+            members = order[bounds[g]:bounds[g + 1]]
+            result.append((tuple(group.split('\x1f')), len(members), float(np.median(days[members])),
+                           float(days[members].mean()), int(sq_ft[members].sum())))
+        return result
+
+    def leased_by_month(self):
+        """[(YYYY-MM, sq ft taken off the market that month)] from ended intervals."""
+        intervals = self.intervals()
+        ended = ~np.isnat(intervals["removed_on"])
+        months = intervals["removed_on"][ended].astype('datetime64[M]')
+        if not len(months):
+            return []
+        unique, inverse = np.unique(months, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.sq_ft[intervals["key"][ended]])
+        return [(str(month), int(total)) for month, total in zip(unique, totals)]
+
+
+def load_history(data_dir="data"):
+    """Build a SuiteHistory from the store when it exists, otherwise from the JSON files."""
+    if os.path.exists(store_path):
+        store = VacancyStore()
+        store.ingest_dir(data_dir)
+        history = SuiteHistory.from_store(store)
+        store.close()
+        return history
+    return SuiteHistory.from_json(data_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite time-on-market analytics over all snapshots.")
+    sub = parser.add_subparsers(dest="command")
+    suite_cmd = sub.add_parser("suite", help="listing history of one suite")
+    suite_cmd.add_argument("property")
+    suite_cmd.add_argument("suite_number")
+    rollup_cmd = sub.add_parser("rollup", help="days on market by group")
+    rollup_cmd.add_argument("--by", default="city,type", help="comma-separated: city, type, size")
+    rollup_cmd.add_argument("--leased", action="store_true", help="only suites that came off the market")
+    sub.add_parser("leased", help="sq ft taken off the market per month")
+    args = parser.parse_args(argv)
+
+    history = load_history()
+    if args.command == "suite":
+        record = history.suite(args.property, args.suite_number)
+        if record is None:
+            print(f"{args.property} suite {args.suite_number} was never listed")
+            return 1
+        print(json.dumps(record, indent=4, ensure_ascii=False))
+    elif args.command == "leased":
+        for month, sq_ft in history.leased_by_month():
+            print(f"{month}: {sq_ft} sq ft")
+    else:
+        by = tuple(args.by.split(',')) if args.command == "rollup" else ('city', 'type')
+        leased = args.command == "rollup" and args.leased
+        for group, count, median, mean, sq_ft in history.rollup(by, leased):
+            print(f"{' / '.join(group)}: {count} listings, median {median:g} days, mean {mean:.1f} days, {sq_ft} sq ft")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
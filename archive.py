@@ -0,0 +1,68 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+# Root of the raw page archive (ALLIED_ARCHIVE overrides)
+archive_root = os.environ.get("ALLIED_ARCHIVE", "archive")
+
+
+class PageArchive:
+    """
+    Compressed, content-addressed store of rendered pages.
+
+    Pages live once under objects/<aa>/<sha256>.html.gz however many days they appear on;
+    <date>.jsonl maps each day's keys ('listing' or a property link) to their digests.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or archive_root
+        self.lock = threading.Lock()
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.gz")
+
+    def index_path(self, date):
+        return os.path.join(self.root, f"{date}.jsonl")
+
+    def store(self, date, key, html):
+        """Archive html under key for date and return its digest."""
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        with self.lock:
+            with open(self.index_path(date), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"key": key, "sha256": digest}) + "\n")
+        return digest
+
+    def dates(self):
+        """Archived dates as YYYY-MM-DD strings, sorted."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(f[:-len(".jsonl")] for f in os.listdir(self.root) if f.endswith(".jsonl"))
+
+    def index(self, date):
+        """{key: digest} for date; a key stored twice keeps its last page."""
+        index = {}
+        path = self.index_path(date)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    index[entry["key"]] = entry["sha256"]
+        return index
+
+    def load(self, digest):
+        with gzip.open(self.object_path(digest), 'rb') as f:
+            return f.read().decode('utf-8')
@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listing_parser import parse_listing  # noqa: E402
+from suite_parser import parse_suites_detailed  # noqa: E402
+from synth import SCALES, generate  # noqa: E402
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(bench_dir)
+fixtures_dir = os.path.join(bench_dir, "fixtures")
+baselines_file = os.path.join(bench_dir, "baselines.json")
+
+# Detail-page layouts and the strategy each fixture must match
+LAYOUTS = ("table", "numbered", "generic", "labelled")
+
+# Minimum time spent parsing each fixture per round
+parse_seconds = 0.5
+
+# Rounds per measurement; the best one is kept to damp scheduler noise
+repeat = 3
+
+# Absolute changes below these (by metric suffix) never count as regressions, whatever the
+# relative change: a warm aggregator run is ~0.1 s, mostly interpreter startup, and
+# swings by half of that between runs of the same code
+noise_floor = {"_wall_s": 0.15, "_rss_mb": 2.0}
+
+
+def pages_per_second(parse, html):
+    """Parse html repeatedly for at least parse_seconds per round; the best round's rate."""
+    best = 0
+    for _ in range(repeat):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            parse(html)
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= parse_seconds:
+                break
+        best = max(best, count / elapsed)
+    return best
+
+
+def bench_parse():
+    """{fixture: pages/s} for the listing page and each detail layout."""
+    results = {}
+    with open(os.path.join(fixtures_dir, "listing.html"), 'r', encoding='utf-8') as f:
+        html = f.read()
+    with redirect_stdout(open(os.devnull, 'w')):
+        results["listing"] = pages_per_second(parse_listing, html)
+    for layout in LAYOUTS:
+        with open(os.path.join(fixtures_dir, f"detail_{layout}.html"), 'r', encoding='utf-8') as f:
+            html = f.read()
+        suites, _, strategy = parse_suites_detailed(html)
+        if strategy != layout or not suites:
+            raise RuntimeError(f"detail_{layout}.html parsed as {strategy} with {len(suites)} suites")
+        results[layout] = pages_per_second(parse_suites_detailed, html)
+    return results
+
+
+# Runs a script and reports its own peak RSS (kB) on stderr. ru_maxrss of a child would
+# include the high-water mark inherited from this process across fork and exec.
+PEAK_RSS_RUNNER = """
+import sys, runpy, resource
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+sys.path.insert(0, __import__('os').path.dirname(script))
+try:
+    runpy.run_path(script, run_name='__main__')
+finally:
+    try:
+        with open('/proc/self/status') as f:
+            peak = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sys.stderr.write(f"peak_rss_kb={peak}\\n")
+"""
+
+
+def run_aggregator(work_dir, *args):
+    """Run aggregator.py in work_dir. Returns (wall seconds, peak RSS in MB)."""
+    env = {k: v for k, v in os.environ.items() if not k.startswith("ALLIED_")}
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", PEAK_RSS_RUNNER, os.path.join(repo_dir, "aggregator.py"), *args],
+                            cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(f"aggregator.py exited with {result.returncode} in {work_dir}: {result.stderr[-500:]}")
+    peak = int(result.stderr.rsplit("peak_rss_kb=", 1)[1])
+    return elapsed, peak / 1024
+
+
+def bench_aggregator(scale, source_dir):
+    """
+    Cold (no store, empty diff cache) and warm (cached) aggregator runs on synthetic data,
+    keeping the best of repeat runs of each.
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"allied-bench-{scale}-")
+    cache_file = os.path.join(work_dir, "data", "diff_cache.sqlite")
+    try:
+        files = generate(source_dir, os.path.join(work_dir, "data"), *SCALES[scale])
+        cold = []
+        for _ in range(repeat):
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+            cold.append(run_aggregator(work_dir))
+        warm = [run_aggregator(work_dir) for _ in range(repeat)]
+    finally:
+        shutil.rmtree(work_dir)
+    return {"snapshots": files,
+            "cold_wall_s": min(wall for wall, _ in cold), "cold_peak_rss_mb": min(rss for _, rss in cold),
+            "warm_wall_s": min(wall for wall, _ in warm), "warm_peak_rss_mb": min(rss for _, rss in warm)}
+
+
+def compare(results, baselines, tolerance):
+    """
+    Lines describing each metric against its baseline, and whether any regressed: worse by
+    more than tolerance and by more than the metric's noise_floor.
+    """
+    lines = []
+    regressed = False
+    for section, metrics in results.items():
+        for name, values in metrics.items():
+            for metric, value in (values.items() if isinstance(values, dict) else [("pages_per_s", values)]):
+                if metric == "snapshots":
+                    continue
+                baseline = baselines.get(section, {}).get(name)
+                if isinstance(baseline, dict):
+                    baseline = baseline.get(metric)
+                label = f"{section} {name} {metric}: {value:.2f}"
+                if baseline is None:
+                    lines.append(f"{label} (no baseline)")
+                    continue
+                # Throughput should not drop; time and memory should not grow
+                change = value / baseline - 1
+                worse = -change if metric == "pages_per_s" else change
+                floor = next((v for suffix, v in noise_floor.items() if metric.endswith(suffix)), 0)
+                is_regression = worse > tolerance and abs(value - baseline) > floor
+                status = "REGRESSED" if is_regression else "ok"
+                regressed = regressed or is_regression
+                lines.append(f"{label} vs {baseline:.2f} ({change:+.0%}) {status}")
+    return lines, regressed
+
+
+def main(argv=None):
+    global repeat
+    parser = argparse.ArgumentParser(description="Offline parser and aggregator benchmarks.")
+    parser.add_argument("--scale", action="append", choices=sorted(SCALES),
+                        help="aggregator scales to run (default: 1x and 10x)")
+    parser.add_argument("--source", default=os.path.join(repo_dir, "data"), help="snapshots to scale up")
+    parser.add_argument("--skip-parse", action="store_true")
+    parser.add_argument("--repeat", type=int, default=repeat, help="runs per measurement, best kept")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--save", action="store_true", help="store these results as the new baselines")
+    args = parser.parse_args(argv)
+
+    repeat = args.repeat
+    results = {}
+    if not args.skip_parse:
+        results["parse"] = bench_parse()
+    results["aggregator"] = {scale: bench_aggregator(scale, os.path.abspath(args.source))
+                             for scale in args.scale or ["1x", "10x"]}
+
+    baselines = {}
+    if os.path.exists(baselines_file):
+        with open(baselines_file, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+    lines, regressed = compare(results, baselines, args.tolerance)
+    for line in lines:
+        print(line)
+
+    if args.save:
+        for section, metrics in results.items():
+            baselines.setdefault(section, {}).update(metrics)
+        with open(baselines_file, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=4)
+        print(f"Baselines saved to {baselines_file}")
+        return 0
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+import argparse
+from datetime import date as Date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import cleaned_files  # noqa: E402
+
+# Named scales as (property factor, day factor)
+SCALES = {
+    "1x": (1, 1),
+    "10x": (10, 1),
+    "100x": (10, 10),
+}
+
+
+def scale_property(prop, copy):
+    """The copy-th clone of a property; copy 0 is the property itself."""
+    if copy == 0:
+        return prop
+    return dict(prop, name=f"{prop['name']} ({copy})", link=f"{prop.get('link', '')}#{copy}")
+
+
+def generate(source_dir, out_dir, property_factor, day_factor):
+    """
+    Write data/-style _cleaned.json snapshots into out_dir, with property_factor clones of
+    every property and the source history replayed day_factor times on consecutive dates.
+    Returns the number of files written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    sources = cleaned_files(source_dir)
+    day = Date.fromisoformat(sources[0][0])
+    written = 0
+    for _ in range(day_factor):
+        for _, f in sources:
+            with open(os.path.join(source_dir, f), 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            data['date'] = day.isoformat()
+            data['properties'] = [scale_property(prop, copy) for copy in range(property_factor)
+                                  for prop in data.get('properties', [])]
+            with open(os.path.join(out_dir, f"allied_{day.isoformat()}_cleaned.json"), 'w', encoding='utf-8') as fh:
+                json.dump(data, fh, indent=4)
+            day += timedelta(days=1)
+            written += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate scaled synthetic snapshots from data/.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", default="10x", choices=sorted(SCALES))
+    parser.add_argument("--source", default="data")
+    args = parser.parse_args(argv)
+    written = generate(args.source, args.out_dir, *SCALES[args.scale])
+    print(f"Wrote {written} snapshots ({args.scale}) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import threading
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+# Requests the scrape never needs: images, media, fonts and analytics/ad scripts.
+# The TrustArc consent script is left alone so the banner behaves as usual.
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mov", "*.mp3",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*connect.facebook.net*", "*hotjar.com*", "*snap.licdn.com*", "*bat.bing.com*",
+    "*youtube.com/embed*", "*player.vimeo.com*",
+]
+
+# Chrome preferences that stop images before the DevTools block list is even consulted
+BLOCKING_PREFS = {"profile.managed_default_content_settings.images": 2}
+
+COOKIE_BUTTON = (By.CSS_SELECTOR, ".trustarc-acceptall-btn")
+
+# Cookies TrustArc sets once a choice was made on the banner
+CONSENT_COOKIE_NAMES = {"notice_preferences", "notice_gdpr_prefs", "cmapi_cookie_privacy"}
+
+
+def block_resources(driver):
+    """Have Chrome drop BLOCKED_URL_PATTERNS requests (DevTools Network.setBlockedURLs)."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"Could not enable request blocking: {e}")
+
+
+class BrowserSession:
+    """
+    One Chrome driver and its cookie-consent state, reused for every page it loads.
+
+    The driver is only started on first use. Once any session accepts the TrustArc
+    banner its cookies are shared, and sessions started afterwards get them installed
+    before their first page, so the banner is dealt with once per run.
+    """
+
+    consent_cookies = None
+    consent_lock = threading.Lock()
+
+    def __init__(self, create_driver, block=True):
+        self.create_driver = create_driver
+        self.block = block
+        self._driver = None
+        self.consented = False
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = self.create_driver()
+            if self.block:
+                block_resources(self._driver)
+            self.install_consent()
+        return self._driver
+
+    def install_consent(self):
+        """Set the shared consent cookies on a fresh driver (DevTools Network.setCookies)."""
+        cookies = BrowserSession.consent_cookies
+        if not cookies:
+            return
+        params = []
+        for cookie in cookies:
+            param = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite")
+                     if k in cookie}
+            if "expiry" in cookie:
+                param["expires"] = cookie["expiry"]
+            params.append(param)
+        try:
+            self._driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+            self.consented = True
+        except Exception as e:
+            print(f"Could not install consent cookies: {e}")
+
+    def has_consent_cookie(self):
+        try:
+            return any(cookie['name'] in CONSENT_COOKIE_NAMES for cookie in self._driver.get_cookies())
+        except Exception:
+            return False
+
+    def remember_consent(self):
+        self.consented = True
+        with BrowserSession.consent_lock:
+            if BrowserSession.consent_cookies is None:
+                BrowserSession.consent_cookies = self._driver.get_cookies()
+
+    def accept_cookies(self, timeout, ready=None):
+        """
+        Click the consent banner if this session has not consented yet.
+
+        Waits up to timeout for the button, or only until the ready locator appears.
+        Returns True when the banner was clicked. When the click fails (e.g. the banner is
+        still animating in), consent is only recorded if TrustArc's cookies show it was
+        already given; otherwise the next page tries again.
+        """
+        if self.consented:
+            return False
+        condition = EC.element_to_be_clickable(COOKIE_BUTTON)
+        if ready is not None:
+            condition = EC.any_of(condition, EC.presence_of_element_located(ready))
+        try:
+            WebDriverWait(self.driver, timeout).until(condition)
+            self.driver.find_element(*COOKIE_BUTTON).click()
+        except (TimeoutException, NoSuchElementException):
+            return False
+        except Exception as e:
+            if self.has_consent_cookie():
+                # The banner exists but is hidden because consent was already given
+                self.remember_consent()
+            else:
+                print(f"Could not click the cookie banner yet: {e.__class__.__name__}")
+            return False
+        self.remember_consent()
+        return True
+
+    def quit(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
@@ -0,0 +1,97 @@
+import os
+import json
+import sqlite3
+import hashlib
+
+# Cached day-over-day comparisons for aggregator.py (ALLIED_DIFF_CACHE overrides)
+cache_path = os.environ.get("ALLIED_DIFF_CACHE", os.path.join("data", "diff_cache.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    prev_key TEXT NOT NULL,
+    curr_key TEXT NOT NULL,
+    events TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    PRIMARY KEY (prev_key, curr_key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class DiffCache:
+    """
+    Per-pair diff results keyed by each file's name and content hash.
+
+    Hashes are only recomputed when a file's mtime or size changes, so a regenerated
+    cleaned file gets a new key (and a cache miss) while untouched files cost one stat.
+    Pairs cached under a different version (diffs.DIFF_VERSION) are dropped on open.
+    """
+
+    def __init__(self, path=None, version=None):
+        self.conn = sqlite3.connect(path or cache_path)
+        self.conn.executescript(SCHEMA)
+        if version is not None:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != str(version):
+                with self.conn:
+                    self.conn.execute("DELETE FROM pairs")
+                    self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(version),))
+        self.files = {row[0]: row[1:] for row in self.conn.execute("SELECT file, mtime_ns, size, sha256 FROM files")}
+
+    def file_key(self, path):
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        entry = self.files.get(name)
+        if entry and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            digest = entry[2]
+        else:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self.files[name] = (stat.st_mtime_ns, stat.st_size, digest)
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                  (name, stat.st_mtime_ns, stat.st_size, digest))
+        return f"{name}:{digest}"
+
+    def get(self, prev_key, curr_key):
+        """(events, summary) for the pair, or None on a miss."""
+        row = self.conn.execute("SELECT events, summary FROM pairs WHERE prev_key = ? AND curr_key = ?",
+                                (prev_key, curr_key)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, prev_key, curr_key, events, summary):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?)",
+                              (prev_key, curr_key, json.dumps(events), json.dumps(summary)))
+
+    def prune(self, keys):
+        """Drop pairs and files that are no longer part of the history."""
+        keys = set(keys)
+        names = {key.split(':', 1)[0] for key in keys}
+        with self.conn:
+            stale = [row for row in self.conn.execute("SELECT prev_key, curr_key FROM pairs")
+                     if row[0] not in keys or row[1] not in keys]
+            self.conn.executemany("DELETE FROM pairs WHERE prev_key = ? AND curr_key = ?", stale)
+            for name in set(self.files) - names:
+                self.conn.execute("DELETE FROM files WHERE file = ?", (name,))
+                del self.files[name]
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM pairs")
+            self.conn.execute("DELETE FROM files")
+        self.files = {}
+
+    def close(self):
+        self.conn.close()
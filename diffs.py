@@ -0,0 +1,88 @@
+import os
+import json
+
+from identity import match_suites
+
+# Bumped whenever diff_snapshots would give different results for the same files, so
+# cached comparisons from an older version are recomputed
+DIFF_VERSION = 2
+
+# Suite fields compared for suites present on both days, and the event each change emits
+CHANGE_EVENTS = (
+    ("sq_ft", "resized"),
+    ("type", "type_changed"),
+    ("net_rent", "rent_changed"),
+    ("additional_rent", "rent_changed"),
+    ("availability", "availability_changed"),
+)
+
+
+def diff_snapshots(prev_date, prev_data, curr_date, curr_data):
+    """
+    Compare two consecutive snapshots.
+
+    Suites are paired with identity.match_suites, so a generic 'Suite N' that only moved
+    position is not reported as removed and re-added. Returns (events, summary). Events
+    are dicts with a "type" of added, removed, resized, type_changed, rent_changed or
+    availability_changed, ordered by property name and suite number. The summary holds
+    the day's added/removed sq ft and their net (positive indicates net leased).
+    """
+    prev_properties = {p['name']: p for p in prev_data.get('properties', [])}
+    curr_properties = {p['name']: p for p in curr_data.get('properties', [])}
+    base = {"prev_date": str(prev_date), "date": str(curr_date)}
+
+    events = []
+    total_added_sqft = 0
+    total_removed_sqft = 0
+    for prop_name in sorted(prev_properties.keys() | curr_properties.keys()):
+        prev_prop = prev_properties.get(prop_name, {})
+        curr_prop = curr_properties.get(prop_name, {})
+        prev_suites = prev_prop.get('suites', [])
+        curr_suites = curr_prop.get('suites', [])
+        link = curr_prop.get('link', prev_prop.get('link'))
+        pairs, removed, added = match_suites(link, prev_suites, curr_suites)
+
+        for j in sorted(added, key=lambda j: curr_suites[j]['suite_number']):
+            suite = curr_suites[j]
+            total_added_sqft += suite['sq_ft']
+            events.append(dict(base, type="added", property=prop_name, suite_number=suite['suite_number'],
+                               sq_ft=suite['sq_ft']))
+        for i in sorted(removed, key=lambda i: prev_suites[i]['suite_number']):
+            suite = prev_suites[i]
+            total_removed_sqft += suite['sq_ft']
+            events.append(dict(base, type="removed", property=prop_name, suite_number=suite['suite_number'],
+                               sq_ft=suite['sq_ft']))
+        for i, j in sorted(pairs, key=lambda pair: curr_suites[pair[1]]['suite_number']):
+            old, new = prev_suites[i], curr_suites[j]
+            for field, event_type in CHANGE_EVENTS:
+                if old.get(field) != new.get(field):
+                    events.append(dict(base, type=event_type, property=prop_name, suite_number=new['suite_number'],
+                                       field=field, old=old.get(field), new=new.get(field)))
+
+    summary = dict(base, type="summary", added_sqft=total_added_sqft, removed_sqft=total_removed_sqft,
+                   net_sqft=total_removed_sqft - total_added_sqft)
+    return events, summary
+
+
+def describe(event):
+    """The human-readable line aggregator.py prints for added and removed suites, else None."""
+    if event["type"] in ("added", "removed"):
+        return f"{event['property']} suite {event['suite_number']} {event['type']} ({event['sq_ft']} sq ft)"
+    return None
+
+
+class EventWriter:
+    """Writes events and summaries as JSONL, replacing path only once the run completes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = f"{path}.tmp"
+        self.file = open(self.tmp, 'w', encoding='utf-8')
+
+    def write(self, records):
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp, self.path)
@@ -0,0 +1,52 @@
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
+
+# Point every request somewhere else, e.g. a local stand-in serving saved pages:
+#   python -m http.server 8000 --directory saved_pages
+#   ALLIED_BASE_URL=http://localhost:8000 python allied.py
+# Saved pages keep their site paths (saved_pages/properties/<slug>/index.html).
+base_url = os.environ.get("ALLIED_BASE_URL", "").rstrip('/')
+
+# Seconds to wait for a plain HTTP response
+http_timeout = 15
+
+
+def rebase(link):
+    """Rewrite an alliedreit.com link onto base_url, if one is configured."""
+    if not base_url or not link:
+        return link
+    parts = urlsplit(link)
+    base = urlsplit(base_url)
+    return urlunsplit((base.scheme, base.netloc, base.path + parts.path, parts.query, parts.fragment))
+
+
+def create_session(pool_size=10):
+    """A keep-alive session that reuses up to pool_size connections per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-CA,en;q=0.9",
+    })
+    return session
+
+
+def fetch_page(session, link):
+    """Return the server-rendered HTML for link, or None on any failure."""
+    try:
+        response = session.get(rebase(link), timeout=http_timeout)
+    except requests.RequestException as e:
+        print(f"HTTP fetch failed for {link}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"HTTP fetch for {link} returned {response.status_code}")
+        return None
+    return response.text
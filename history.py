@@ -0,0 +1,283 @@
+import os
+import sys
+import gzip
+import json
+import argparse
+from functools import partial
+
+
+def history_dir(data_dir="data"):
+    """Where the delta-encoded history of data_dir is kept (ALLIED_HISTORY_DIR overrides)."""
+    return os.environ.get("ALLIED_HISTORY_DIR", os.path.join(data_dir, "history"))
+
+
+history_root = history_dir()
+
+# A full keyframe every this many snapshots of a kind; the rest are deltas
+keyframe_every = 30
+
+# File name suffix of each snapshot kind: raw listing, updated and cleaned
+KINDS = {"raw": "", "updated": "_updated", "cleaned": "_cleaned"}
+
+# How snapshot files have been serialized: indent=4 before the pipeline, compact since
+FORMATS = {"indent": {"indent": 4}, "compact": {"separators": (',', ':')}}
+
+
+def snapshot_name(date, kind):
+    return f"allied_{date}{KINDS[kind]}.json"
+
+
+def parse_snapshot_name(filename):
+    """(date, kind) for an allied_<date>[_updated|_cleaned].json name, else None."""
+    if not (filename.startswith("allied_") and filename.endswith(".json")):
+        return None
+    stem = filename[len("allied_"):-len(".json")]
+    date, _, suffix = stem.partition("_")
+    for kind, kind_suffix in KINDS.items():
+        if kind_suffix == (f"_{suffix}" if suffix else "") and len(date) == 10:
+            return date, kind
+    return None
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def encode(prev, curr):
+    """
+    Encode curr relative to prev.
+
+    Properties identical to one in prev become its index. A changed property is stored
+    with "b" naming the prev property of the same name, whose identical suites are in
+    turn replaced by their index. Key order is preserved, so decoding and dumping with
+    the file's original FORMATS options gives back the original bytes.
+    """
+    prev_properties = prev.get('properties', [])
+    by_text = {}
+    by_name = {}
+    for i, prop in enumerate(prev_properties):
+        by_text.setdefault(json.dumps(prop), i)
+        by_name.setdefault(prop.get('name'), i)
+    properties = []
+    for prop in curr.get('properties', []):
+        same = by_text.get(json.dumps(prop))
+        if same is not None:
+            properties.append(same)
+            continue
+        base = by_name.get(prop.get('name'))
+        if base is None or 'suites' not in prop:
+            properties.append({"b": None, "v": prop})
+            continue
+        base_suites = {}
+        for i, suite in enumerate(prev_properties[base].get('suites', [])):
+            base_suites.setdefault(json.dumps(suite), i)
+        suites = [base_suites.get(json.dumps(suite), suite) for suite in prop['suites']]
+        properties.append({"b": base, "v": dict(prop, suites=suites)})
+    return {"keys": list(curr), "top": {k: v for k, v in curr.items() if k != 'properties'},
+            "properties": properties}
+
+
+def decode(prev, delta):
+    prev_properties = prev.get('properties', [])
+    properties = []
+    for entry in delta["properties"]:
+        if isinstance(entry, int):
+            properties.append(prev_properties[entry])
+        elif entry["b"] is None:
+            properties.append(entry["v"])
+        else:
+            base_suites = prev_properties[entry["b"]].get('suites', [])
+            prop = entry["v"]
+            properties.append(dict(prop, suites=[
+                base_suites[s] if isinstance(s, int) else s for s in prop['suites']]))
+    return {k: properties if k == 'properties' else delta["top"][k] for k in delta["keys"]}
+
+
+class SnapshotHistory:
+    """
+    Per-kind chains of gzip records under <root>/<kind>/<date>.json.gz.
+
+    A record is either a keyframe {"depth": 0, "data": ...} or a delta
+    {"depth": n, "base": date, "delta": ...} against the previous date of the same kind,
+    plus the file's "format" (see FORMATS). Files in neither format are kept verbatim
+    ({"depth": 0, "text": ...}).
+    """
+
+    def __init__(self, root=None):
+        self.root = root or history_root
+        self.cache = {}
+
+    def path(self, date, kind):
+        return os.path.join(self.root, kind, f"{date}.json.gz")
+
+    def dates(self, kind):
+        directory = os.path.join(self.root, kind)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(f[:10] for f in os.listdir(directory) if f.endswith(".json.gz"))
+
+    def record(self, date, kind):
+        with gzip.open(self.path(date, kind), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, date, kind="cleaned"):
+        """The snapshot for date, as json.load would have returned it."""
+        key = (date, kind)
+        if key in self.cache:
+            return self.cache[key]
+        # Walk back to the keyframe, then apply the deltas forward
+        chain = []
+        record = self.record(date, kind)
+        while "delta" in record:
+            chain.append(record)
+            base_key = (record["base"], kind)
+            if base_key in self.cache:
+                data = self.cache[base_key]
+                break
+            record = self.record(record["base"], kind)
+        else:
+            data = record["data"] if "data" in record else json.loads(record["text"])
+        for record in reversed(chain):
+            data = decode(data, record["delta"])
+        self.cache = {key: data}
+        return data
+
+    def read(self, date, kind="cleaned"):
+        """The original file text for date."""
+        record = self.record(date, kind)
+        if "text" in record:
+            return record["text"]
+        return json.dumps(self.load(date, kind), **FORMATS[record.get("format", "indent")])
+
+    def encode_record(self, text, base=None, base_data=None, base_depth=0):
+        """(record, data) for a file's text, as a delta on base (date, its data, its depth) where possible."""
+        data = json.loads(text)
+        file_format = next((name for name, options in FORMATS.items() if json.dumps(data, **options) == text), None)
+        if file_format is None or not isinstance(data, dict):
+            return {"depth": 0, "text": text}, data
+        if base is None or not isinstance(base_data, dict) or base_depth + 1 >= keyframe_every:
+            return {"depth": 0, "format": file_format, "data": data}, data
+        return {"depth": base_depth + 1, "format": file_format, "base": base,
+                "delta": encode(base_data, data)}, data
+
+    def update(self, kind, sources):
+        """
+        Store new or changed files of one kind; sources maps dates to a function returning
+        the file's text.
+
+        Every later snapshot is a delta on an earlier one, so the chain is re-encoded from
+        the earliest date in sources on. Only the later days that keep their content are
+        held in memory. The new records are written next to the old ones and swapped in
+        once all are written.
+        """
+        if not sources:
+            return
+        start = min(sources)
+        dates = self.dates(kind)
+        kept = {date: partial(str, self.read(date, kind)) for date in dates if date >= start and date not in sources}
+        base = next((d for d in reversed(dates) if d < start), None)
+        base_data = self.load(base, kind) if base else None
+        base_depth = self.record(base, kind).get("depth", 0) if base else 0
+        written = []
+        for date in sorted(set(sources) | set(kept)):
+            text = (sources.get(date) or kept[date])()
+            record, data = self.encode_record(text, base, base_data, base_depth)
+            path = self.path(date, kind)
+            self.write(f"{path}.new", record)
+            written.append(path)
+            base, base_data, base_depth = date, data, record["depth"]
+        for path in written:
+            os.replace(f"{path}.new", path)
+        self.cache = {(base, kind): base_data}
+
+    def write(self, path, record):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8', compresslevel=9) as f:
+            json.dump(record, f, separators=(',', ':'))
+
+    def add(self, date, kind, text):
+        """Store one file's text for date, replacing an earlier version of that day."""
+        self.update(kind, {date: partial(str, text)})
+
+    def add_file(self, path):
+        parsed = parse_snapshot_name(os.path.basename(path))
+        if parsed is None:
+            raise ValueError(f"Not a snapshot file: {path}")
+        with open(path, 'r', encoding='utf-8') as f:
+            self.add(parsed[0], parsed[1], f.read())
+
+
+def migrate(data_dir, root=None, remove=False):
+    """
+    Encode every snapshot file in data_dir into the history and check that each one
+    reads back byte for byte. Days already in the history (an earlier migrate, or days
+    added with ALLIED_HISTORY=1) are skipped unless the file changed since (reparse.py,
+    pipeline.py); new or changed days may be older than the newest one stored. Originals
+    are only deleted with remove=True. Returns (files, files added or changed, bytes
+    before, bytes after).
+    """
+    history = SnapshotHistory(root)
+    files = sorted((parsed, f) for f in os.listdir(data_dir)
+                   if (parsed := parse_snapshot_name(f)) is not None)
+    existing = {kind: set(history.dates(kind)) for kind in KINDS}
+    sources = {kind: {} for kind in KINDS}
+    before = 0
+    for (date, kind), f in files:
+        path = os.path.join(data_dir, f)
+        before += os.path.getsize(path)
+        if date in existing[kind] and history.read(date, kind) == read_text(path):
+            continue
+        sources[kind][date] = partial(read_text, path)
+    for kind, kind_sources in sources.items():
+        history.update(kind, kind_sources)
+    added = sum(len(kind_sources) for kind_sources in sources.values())
+    check = SnapshotHistory(history.root)
+    for (date, kind), f in files:
+        path = os.path.join(data_dir, f)
+        if check.read(date, kind) != read_text(path):
+            raise RuntimeError(f"{f} does not read back identically; originals kept")
+    if remove:
+        for _, f in files:
+            os.remove(os.path.join(data_dir, f))
+    after = sum(os.path.getsize(os.path.join(dirpath, name))
+                for dirpath, _, names in os.walk(history.root) for name in names)
+    return len(files), added, before, after
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delta-encoded snapshot history.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = sub.add_parser("migrate", help="encode the JSON files of a data directory")
+    migrate_cmd.add_argument("data_dir", nargs="?", default="data")
+    migrate_cmd.add_argument("--remove", action="store_true",
+                             help="delete the originals once verified (see the README for what still needs them)")
+    show_cmd = sub.add_parser("show", help="print one reconstructed file")
+    show_cmd.add_argument("date")
+    show_cmd.add_argument("kind", nargs="?", default="cleaned", choices=sorted(KINDS))
+    restore_cmd = sub.add_parser("restore", help="write reconstructed files back")
+    restore_cmd.add_argument("data_dir", nargs="?", default="data")
+    args = parser.parse_args(argv)
+
+    history = SnapshotHistory()
+    if args.command == "migrate":
+        count, added, before, after = migrate(args.data_dir, remove=args.remove)
+        print(f"Migrated {count} files ({added} new or changed): {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({before / max(after, 1):.0f}x)")
+        if args.remove:
+            print(f"Removed the JSON files; run `python history.py restore {args.data_dir}` before "
+                  "an incremental scrape, scheduler.py or identity.py, which read them")
+    elif args.command == "show":
+        sys.stdout.write(history.read(args.date, args.kind))
+    else:
+        for kind in KINDS:
+            for date in history.dates(kind):
+                path = os.path.join(args.data_dir, snapshot_name(date, kind))
+                if not os.path.exists(path):
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(history.read(date, kind))
+                    print(f"Restored {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+
+from store import cleaned_files
+
+# Labels the generic 'Suite #' layout gives suites by position (see suite_parser.parse_generic).
+# They say nothing about which suite is which, so such suites are matched by fingerprint.
+GENERIC_LABEL_RE = re.compile(r'^Suite \d+$')
+
+# Near matches: same type, sq ft within this fraction of each other
+near_match_tolerance = 0.05
+
+# Near-match candidates examined per unmatched suite, which keeps matching linear
+near_match_window = 8
+
+
+def is_generic(label):
+    return bool(GENERIC_LABEL_RE.match(label or ''))
+
+
+def fingerprint(link, suite):
+    return (link, suite.get('type'), suite.get('sq_ft'), suite.get('availability'))
+
+
+def fingerprint_id(link, suite):
+    """Short id derived from a suite's fingerprint, given to suites seen for the first time."""
+    return hashlib.sha1(json.dumps(fingerprint(link, suite)).encode('utf-8')).hexdigest()[:12]
+
+
+def near(old, new):
+    if old.get('type') != new.get('type'):
+        return False
+    old_sqft, new_sqft = old.get('sq_ft') or 0, new.get('sq_ft') or 0
+    return abs(old_sqft - new_sqft) <= near_match_tolerance * max(old_sqft, new_sqft)
+
+
+def match_suites(link, prev_suites, curr_suites):
+    """
+    Pair up one property's suites across two snapshots.
+
+    In order, a pair is: the same label and fingerprint; the same fingerprint where both
+    labels are generic (a reordered 'Suite N'); the same non-generic label (a numbered
+    suite whose details changed); and, where either label is generic, a near match of
+    type and size among the first near_match_window candidates. Generic suites left over
+    are new or gone, whatever their position. Each pass is a hash lookup, so the whole
+    match is linear in the number of suites.
+    Returns (pairs of (prev index, curr index), unmatched prev indexes, unmatched curr indexes).
+    """
+    prev_labels = [suite.get('suite_number') for suite in prev_suites]
+    curr_labels = [suite.get('suite_number') for suite in curr_suites]
+    prev_index = {label: i for i, label in enumerate(prev_labels)}
+    if (len(prev_index) == len(prev_labels) and len(set(curr_labels)) == len(curr_labels)
+            and not any(is_generic(label) for label in prev_labels + curr_labels)):
+        # Unique real suite numbers on both days (the usual case): every pass above comes
+        # down to pairing equal labels
+        pairs = [(prev_index[label], j) for j, label in enumerate(curr_labels) if label in prev_index]
+        curr_seen = set(curr_labels)
+        return (pairs, [i for i, label in enumerate(prev_labels) if label not in curr_seen],
+                [j for j, label in enumerate(curr_labels) if label not in prev_index])
+
+    prev_left = dict(enumerate(prev_suites))
+    curr_left = dict(enumerate(curr_suites))
+    pairs = []
+
+    def pair_by(key, eligible=lambda suite: True):
+        buckets = {}
+        for i, suite in prev_left.items():
+            if eligible(suite):
+                buckets.setdefault(key(suite), []).append(i)
+        for j, suite in list(curr_left.items()):
+            if not eligible(suite):
+                continue
+            candidates = buckets.get(key(suite))
+            if candidates:
+                i = candidates.pop(0)
+                pairs.append((i, j))
+                del prev_left[i]
+                del curr_left[j]
+
+    pair_by(lambda s: (s.get('suite_number'), fingerprint(link, s)))
+    pair_by(lambda s: fingerprint(link, s), lambda s: is_generic(s.get('suite_number')))
+    pair_by(lambda s: s.get('suite_number'), lambda s: not is_generic(s.get('suite_number')))
+
+    # Near matches for what is left of the generic suites, by type
+    by_type = {}
+    for i, suite in prev_left.items():
+        by_type.setdefault(suite.get('type'), []).append(i)
+    for j, suite in list(curr_left.items()):
+        candidates = by_type.get(suite.get('type'), [])
+        for i in candidates[:near_match_window]:
+            old = prev_left[i]
+            if (is_generic(old.get('suite_number')) or is_generic(suite.get('suite_number'))) and near(old, suite):
+                pairs.append((i, j))
+                candidates.remove(i)
+                del prev_left[i]
+                del curr_left[j]
+                break
+
+    pairs.sort(key=lambda pair: pair[1])
+    return pairs, sorted(prev_left), sorted(curr_left)
+
+
+class SuiteIdentityIndex:
+    """
+    Stable suite ids across a date-ordered stream of snapshots.
+
+    A suite matched to one in the previous snapshot (see match_suites) keeps its id;
+    any other suite gets a new id from its fingerprint.
+    """
+
+    def __init__(self):
+        self.previous = {}  # property name -> (link, suites, ids)
+        self.known = set()
+
+    def new_id(self, link, suite):
+        base = fingerprint_id(link, suite)
+        suite_id = base
+        n = 1
+        while suite_id in self.known:
+            n += 1
+            suite_id = f"{base}-{n}"
+        self.known.add(suite_id)
+        return suite_id
+
+    def observe(self, data):
+        """{property name: [suite id per suite, in order]} for one snapshot."""
+        assigned = {}
+        for prop in data.get('properties', []):
+            link = prop.get('link')
+            suites = prop.get('suites', [])
+            ids = [None] * len(suites)
+            if prop['name'] in self.previous:
+                _, prev_suites, prev_ids = self.previous[prop['name']]
+                pairs, _, _ = match_suites(link, prev_suites, suites)
+                for i, j in pairs:
+                    ids[j] = prev_ids[i]
+            for j, suite in enumerate(suites):
+                if ids[j] is None:
+                    ids[j] = self.new_id(link, suite)
+            assigned[prop['name']] = ids
+        self.previous = {prop['name']: (prop.get('link'), prop.get('suites', []), assigned[prop['name']])
+                         for prop in data.get('properties', [])}
+        return assigned
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count distinct suites by label and by stable identity.")
+    parser.add_argument("data_dir", nargs="?", default="data")
+    args = parser.parse_args(argv)
+
+    index = SuiteIdentityIndex()
+    labels = set()
+    for date, f in cleaned_files(args.data_dir):
+        with open(os.path.join(args.data_dir, f), 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+        index.observe(data)
+        labels.update((prop['name'], suite['suite_number']) for prop in data.get('properties', [])
+                      for suite in prop.get('suites', []))
+    print(f"{len(labels)} (property, suite number) labels, {len(index.known)} distinct suites by identity")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import os
+import json
+from datetime import datetime
+
+# Listing-page fields that must be unchanged for a property's suites to be carried forward
+LISTING_FIELDS = ("available_suites", "total_gla", "link")
+
+
+def snapshot_date(filename):
+    """Date of an allied_YYYY-MM-DD_*.json file, or None if the name does not match."""
+    try:
+        return datetime.strptime(filename.split('_')[1][:10], '%Y-%m-%d').date()
+    except (IndexError, ValueError):
+        return None
+
+
+def load_latest_snapshot(data_dir, before):
+    """Return (date, data) for the newest _cleaned.json dated before `before`, or (None, None)."""
+    latest = None
+    for f in os.listdir(data_dir):
+        if not (f.startswith('allied_') and f.endswith('_cleaned.json')):
+            continue
+        date = snapshot_date(f)
+        if date and date < before and (latest is None or date > latest[0]):
+            latest = (date, f)
+    if latest is None:
+        return None, None
+    with open(os.path.join(data_dir, latest[1]), 'r', encoding='utf-8') as f:
+        return latest[0], json.load(f)
+
+
+def carry_forward(properties, previous, previous_date, today, max_age_days):
+    """
+    Decide which properties can reuse the previous snapshot's suites.
+
+    A property is carried when its listing fields match the previous snapshot, it was not
+    skipped there, it had suites, and its suites were scraped at most max_age_days ago.
+    Carried properties get a "carried_from" date naming the day they were last scraped.
+    Returns {index in properties: updated property}.
+    """
+    previous_props = {p['name']: p for p in previous.get('properties', [])}
+    previously_skipped = {s['name'] for s in previous.get('skipped_properties', [])}
+    carried = {}
+    for index, prop in enumerate(properties):
+        if prop['available_suites'] <= 0 or prop['name'] in previously_skipped:
+            continue
+        old = previous_props.get(prop['name'])
+        if not old or not old.get('suites'):
+            continue
+        if any(old.get(field) != prop[field] for field in LISTING_FIELDS):
+            continue
+        scraped_on = old.get('carried_from', previous_date.isoformat())
+        age = (today - datetime.strptime(scraped_on, '%Y-%m-%d').date()).days
+        if age > max_age_days:
+            continue
+        updated_prop = prop.copy()
+        updated_prop['available_sqft'] = old.get('available_sqft', sum(s['sq_ft'] for s in old['suites']))
+        updated_prop['suites'] = old['suites']
+        updated_prop['carried_from'] = scraped_on
+        carried[index] = updated_prop
+    return carried
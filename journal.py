@@ -0,0 +1,86 @@
+import os
+import json
+
+
+class Journal:
+    """
+    Append-only JSONL checkpoint of finished properties for one run.
+
+    Each line is {"property": updated_prop, "skipped": skipped entry or null}. Lines are
+    flushed as they are written and fsync'd every fsync_every records, so a crash loses at
+    most the line being written. replay() drops a torn last line.
+    """
+
+    def __init__(self, path, fsync_every=10):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.unsynced = 0
+        self.file = None
+
+    def replay(self):
+        """Return the records already in the journal, oldest first."""
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        good = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good += len(line)
+        if good < os.path.getsize(self.path):
+            # Cut the torn line so the next append starts on a fresh line
+            print(f"Dropping incomplete journal line in {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+        return records
+
+    def append(self, updated_prop, skip=None):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps({"property": updated_prop, "skipped": skip}, separators=(',', ':')) + "\n")
+        self.file.flush()
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        if self.file is not None and self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        """Drop the journal once its contents are compacted into the snapshot files."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def resume_from(records, properties, listing_fields):
+    """
+    Map listing indexes to journaled results that can be reused after a restart.
+
+    A record is reused when its property name is still listed with the same listing
+    fields and it was not skipped; skipped properties get another attempt.
+    Returns {index: updated_prop}.
+    """
+    done = {}
+    for record in records:
+        if record.get('skipped') is None:
+            done[record['property']['name']] = record['property']
+    resumed = {}
+    for index, prop in enumerate(properties):
+        old = done.get(prop['name'])
+        if old and all(old.get(field) == prop[field] for field in listing_fields):
+            resumed[index] = old
+    return resumed
@@ -0,0 +1,79 @@
+import re
+from bs4 import BeautifulSoup
+
+
+def parse_listing(page_source):
+    """Parse the article.item cards of the properties page into property dicts."""
+    properties = []
+    soup = BeautifulSoup(page_source, 'html.parser')
+    property_articles = soup.find_all('article', class_='item')
+    print(f"Found {len(property_articles)} articles")
+
+    for article in property_articles:
+        name = None
+        try:
+            # Name
+            name_elem = article.find('h2')
+            if not name_elem:
+                print("Skipping article: No name found")
+                continue
+            name = name_elem.text.strip()
+
+            # City
+            city_elem = article.find('p', class_='paragraph-2 uppercase bold')
+            city = city_elem.text.strip() if city_elem else ""
+            if ',' in city:
+                city = city.split(',')[-1].strip()
+            if not city:
+                print(f"Warning: Empty city for {name}")
+
+            # Total GLA
+            total_gla = 0
+            gla_elem = article.find('p', class_='body', string=re.compile(r'\d+\s*SQ\.\s*FT\.\s*total GLA'))
+            if gla_elem:
+                gla_match = re.search(r'(\d{1,3}(,\d{3})*)', gla_elem.text.strip())
+                if gla_match:
+                    total_gla = int(gla_match.group(1).replace(',', ''))
+            else:
+                # Fallback for variations
+                gla_fallback = article.find(string=re.compile(r'\d+\s*(square feet|SQ\. FT\.)'))
+                if gla_fallback:
+                    gla_match = re.search(r'(\d{1,3}(,\d{3})*)', gla_fallback.strip())
+                    if gla_match:
+                        total_gla = int(gla_match.group(1).replace(',', ''))
+                        print(f"Fallback GLA used for {name}: {total_gla}")
+            if total_gla == 0:
+                print(f"Warning: Empty total_gla for {name}")
+
+            # Available suites
+            available_suites = 0
+            suites_elem = article.find('p', class_='body', string=re.compile(r'Suites available: \d+'))
+            if suites_elem:
+                suites_match = re.search(r'Suites available: (\d+)', suites_elem.text.strip())
+                if suites_match:
+                    available_suites = int(suites_match.group(1))
+            else:
+                print(f"Warning: No suites found for {name}")
+
+            # Link
+            link_elem = article.find('a')
+            link = link_elem['href'] if link_elem else ""
+            if link and not link.startswith('http'):
+                link = f"https://alliedreit.com{link}"
+            if not link:
+                print(f"Warning: Empty link for {name}")
+
+            property_data = {
+                "name": name,
+                "city": city,
+                "total_gla": total_gla,
+                "available_suites": available_suites,
+                "link": link
+            }
+
+            properties.append(property_data)
+
+        except Exception as e:
+            print(f"Error processing article for {name or 'unknown'}: {e}")
+
+    return properties
@@ -0,0 +1,137 @@
+import io
+import os
+import json
+import pstats
+import cProfile
+import threading
+
+# Percentiles reported in the end-of-run summary
+PERCENTILES = (50, 90, 99)
+
+# Slowest properties listed in the summary
+slowest_count = 5
+
+
+def add_timings(total, timings):
+    """Add per-phase seconds from timings into total, in place."""
+    for phase, seconds in timings.items():
+        total[phase] = round(total.get(phase, 0) + seconds, 2)
+    return total
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+
+
+class MetricsWriter:
+    """
+    Appends one JSON line per scraped property and keeps the records for the summary.
+
+    Safe to call from the detail workers; lines are flushed as they are written so a
+    crashed run still leaves its metrics behind. keep names the properties whose records
+    from an earlier run of the same day carry over (those resumed from the journal);
+    they stay in the file and in the summary.
+    """
+
+    def __init__(self, path, keep=()):
+        self.path = path
+        self.records = []
+        self.lock = threading.Lock()
+        keep = set(keep)
+        if keep and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Cut off by the crash
+                    if record.get('name') in keep:
+                        self.records.append(record)
+        self.file = open(path, 'w', encoding='utf-8')
+        for record in self.records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def write(self, record):
+        with self.lock:
+            self.records.append(record)
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def summarize(records):
+    """Outcome counts, per-phase percentiles, the slowest properties and suite-count mismatches."""
+    phases = {}
+    for record in records:
+        for phase, seconds in record['timings'].items():
+            phases.setdefault(phase, []).append(seconds)
+    outcomes = {}
+    for record in records:
+        outcomes[record['path']] = outcomes.get(record['path'], 0) + 1
+    totals = [record['seconds'] for record in records]
+    return {
+        "properties": len(records),
+        "outcomes": outcomes,
+        "retried": sum(1 for record in records if record['attempts'] > 1),
+        "seconds": {f"p{p}": percentile(totals, p) for p in PERCENTILES} if totals else {},
+        "phases": {phase: {f"p{p}": percentile(values, p) for p in PERCENTILES} | {"max": max(values)}
+                   for phase, values in phases.items()},
+        "slowest": [(record['name'], record['seconds'], record['path'])
+                    for record in sorted(records, key=lambda r: r['seconds'], reverse=True)[:slowest_count]],
+        "mismatches": [(record['name'], record['listing_suites'], record['suites'])
+                       for record in records if record['path'] != 'skipped' and record['suites'] != record['listing_suites']],
+    }
+
+
+def print_summary(summary):
+    outcomes = ", ".join(f"{count} {path}" for path, count in sorted(summary['outcomes'].items()))
+    print(f"Scrape metrics: {summary['properties']} properties ({outcomes}), {summary['retried']} retried")
+    if summary['seconds']:
+        print("  per property: " + ", ".join(f"{p} {s}s" for p, s in summary['seconds'].items()))
+    for phase, stats in summary['phases'].items():
+        print(f"  {phase}: " + ", ".join(f"{p} {s}s" for p, s in stats.items()))
+    if summary['slowest']:
+        print("  slowest: " + "; ".join(f"{name} {seconds}s ({path})" for name, seconds, path in summary['slowest']))
+    print(f"  suite-count mismatches: {len(summary['mismatches'])}")
+    for name, listed, found in summary['mismatches']:
+        print(f"    {name}: listing says {listed}, found {found}")
+
+
+class ParseProfiler:
+    """
+    cProfile around individual parse calls, merged across worker threads.
+
+    Each call gets its own profile, run under a lock: on Python 3.12+ only one profiler
+    can be active in the process at a time, so concurrent parses wait for each other
+    while profiling is on.
+    """
+
+    def __init__(self):
+        self.stats = None
+        self.lock = threading.Lock()
+
+    def run(self, func, *args):
+        with self.lock:
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args)
+            finally:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profile)
+                else:
+                    self.stats.add(profile)
+
+    def dump(self, path, top=15):
+        """Write the merged stats to path and return the top functions by cumulative time."""
+        if self.stats is None:
+            return ""
+        self.stats.dump_stats(path)
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats('cumulative').print_stats(top)
+        return out.getvalue()
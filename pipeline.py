@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import argparse
+
+# Values that mean a label was not given on the page
+PLACEHOLDERS = {"", "-", "--", "n/a", "na", "unknown"}
+
+# Compact separators for the snapshot files
+SEPARATORS = (',', ':')
+
+
+def normalize_label(value):
+    """Collapse whitespace; empty or placeholder values become 'Unknown'."""
+    text = ' '.join(str(value).split()) if value is not None else ''
+    return 'Unknown' if text.lower() in PLACEHOLDERS else text
+
+
+def is_header_row(suite):
+    return suite.get('suite_number') == 'Suite #'
+
+
+def count_suites(suites):
+    """Number of suites, not counting the 'Suite #' header rows."""
+    return sum(1 for suite in suites if not is_header_row(suite))
+
+
+def drop_header_rows(prop):
+    """Remove the 'Suite #' header rows some layouts leave among the suites."""
+    if 'suites' not in prop:
+        return prop
+    return dict(prop, suites=[suite for suite in prop['suites'] if not is_header_row(suite)])
+
+
+def normalize_availability(prop):
+    if 'suites' not in prop:
+        return prop
+    return dict(prop, suites=[dict(suite, availability=normalize_label(suite.get('availability')))
+                              for suite in prop['suites']])
+
+
+def normalize_rents(prop):
+    if 'suites' not in prop:
+        return prop
+    return dict(prop, suites=[dict(suite, net_rent=normalize_label(suite.get('net_rent')),
+                                   additional_rent=normalize_label(suite.get('additional_rent')))
+                              for suite in prop['suites']])
+
+
+def recompute_sqft(prop):
+    """available_sqft from the suites that are left, so dropped rows no longer count."""
+    if 'suites' not in prop:
+        return prop
+    return dict(prop, available_sqft=sum(suite['sq_ft'] for suite in prop['suites'] if suite['sq_ft'] > 0))
+
+
+# Steps applied to every property on its way into _cleaned.json, in order. Each takes a
+# property dict and returns a new one, or None to leave the property out.
+CLEANING_STEPS = (drop_header_rows, normalize_availability, normalize_rents, recompute_sqft)
+
+
+def clean_property(prop, steps=CLEANING_STEPS):
+    for step in steps:
+        prop = step(prop)
+        if prop is None:
+            return None
+    return prop
+
+
+class SnapshotStream:
+    """One snapshot file written property by property, replacing path only on close."""
+
+    def __init__(self, path, date):
+        self.path = path
+        self.file = open(f"{path}.tmp", 'w', encoding='utf-8')
+        self.file.write('{"date":' + json.dumps(date) + ',"properties":[')
+        self.count = 0
+
+    def write(self, prop):
+        self.file.write((',' if self.count else '') + json.dumps(prop, separators=SEPARATORS))
+        self.count += 1
+
+    def close(self, skipped):
+        self.file.write('],"skipped_properties":' + json.dumps(skipped, separators=SEPARATORS) + '}')
+        self.file.close()
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+class SnapshotWriter:
+    """
+    Writes _updated.json and _cleaned.json together, one property at a time.
+
+    Each property goes into the updated file as scraped, and through steps into the
+    cleaned file. The output is the same as json.dump of the whole snapshot with compact
+    separators. Either path may be None to write only the other file.
+    """
+
+    def __init__(self, date, updated_path=None, cleaned_path=None, steps=CLEANING_STEPS):
+        self.steps = steps
+        self.updated = SnapshotStream(updated_path, date) if updated_path else None
+        self.cleaned = SnapshotStream(cleaned_path, date) if cleaned_path else None
+
+    def write(self, prop):
+        if self.updated:
+            self.updated.write(prop)
+        if self.cleaned:
+            cleaned = clean_property(prop, self.steps)
+            if cleaned is not None:
+                self.cleaned.write(cleaned)
+
+    def close(self, skipped):
+        for stream in (self.updated, self.cleaned):
+            if stream:
+                stream.close(skipped)
+
+
+def clean_file(updated_path, cleaned_path, steps=CLEANING_STEPS):
+    """Run an existing _updated.json through the pipeline into cleaned_path."""
+    with open(updated_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    writer = SnapshotWriter(data.get('date'), cleaned_path=cleaned_path, steps=steps)
+    for prop in data.get('properties', []):
+        writer.write(prop)
+    writer.close(data.get('skipped_properties', []))
+
+
+def backfill(data_dir):
+    """Write the missing _cleaned.json of every _updated.json in data_dir. Returns the files written."""
+    written = []
+    for f in sorted(os.listdir(data_dir)):
+        if not (f.startswith('allied_') and f.endswith('_updated.json')):
+            continue
+        cleaned = os.path.join(data_dir, f.replace('_updated.json', '_cleaned.json'))
+        if not os.path.exists(cleaned):
+            clean_file(os.path.join(data_dir, f), cleaned)
+            written.append(cleaned)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write missing _cleaned.json files from _updated.json.")
+    parser.add_argument("data_dir", nargs="?", default="data")
+    args = parser.parse_args(argv)
+    written = backfill(args.data_dir)
+    for path in written:
+        print(f"Cleaned JSON saved to {path}")
+    print(f"Backfilled {len(written)} cleaned snapshots")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
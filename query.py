@@ -0,0 +1,200 @@
+import sys
+import json
+import argparse
+import unicodedata
+from datetime import date as Date, timedelta
+
+from store import VacancyStore
+
+# Columns returned for each suite row
+SUITE_COLUMNS = ("date", "property", "city", "suite_number", "type", "sq_ft",
+                 "availability", "net_rent", "additional_rent")
+
+# Dimensions totals can be grouped by
+TOTAL_DIMENSIONS = ("date", "city", "type")
+
+
+def fold(text):
+    """Case- and accent-insensitive form used to match names, so 'montreal' finds 'Montréal'."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class VacancyQuery:
+    """
+    Point-in-time queries over a VacancyStore.
+
+    Suite queries go through the store's (date), (city, date), (type, date) and
+    (property, date) indexes; unfiltered-by-property totals come from the precomputed
+    daily_totals table, so neither touches the JSON snapshots.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.conn = store.conn
+
+    def dates(self):
+        return [row[0] for row in self.conn.execute("SELECT date FROM snapshots ORDER BY date")]
+
+    def snapshot_on(self, day=None):
+        """The latest snapshot date on or before day (any day when None), or None."""
+        if day is None:
+            return self.conn.execute("SELECT MAX(date) FROM snapshots").fetchone()[0]
+        return self.conn.execute("SELECT MAX(date) FROM snapshots WHERE date <= ?", (day,)).fetchone()[0]
+
+    def date_range(self, date=None, start=None, end=None, last=None):
+        """
+        (start, end) snapshot dates, inclusive. date picks one day; start/end a range;
+        last=N the N days ending at end (or the latest snapshot). Defaults to the latest day.
+        Not every day has a snapshot, so date and end resolve to the latest one on or
+        before them. Returns (None, None) when there is nothing that early.
+        """
+        if date:
+            date = self.snapshot_on(date)
+            return date, date
+        end = self.snapshot_on(end)
+        if end is None:
+            return None, None
+        if last:
+            start = (Date.fromisoformat(end) - timedelta(days=last - 1)).isoformat()
+        return start or end, end
+
+    def ids(self, dictionary, name, partial=False):
+        """Ids whose value matches name (folded; substring when partial), or None without a filter."""
+        if name is None:
+            return None
+        wanted = fold(name)
+        return [row_id for value, row_id in dictionary.ids.items()
+                if (wanted in fold(value) if partial else fold(value) == wanted)]
+
+    def filters(self, start, end, city=None, prop=None, suite_type=None, min_sqft=None, max_sqft=None,
+                city_column="d.city_id"):
+        clauses = ["s.date BETWEEN ? AND ?"]
+        params = [start, end]
+        for column, ids in ((city_column, self.ids(self.store.cities, city)),
+                            ("s.property_id", self.ids(self.store.properties, prop, partial=True)),
+                            ("s.type_id", self.ids(self.store.types, suite_type))):
+            if ids is not None:
+                clauses.append(f"{column} IN ({', '.join('?' * len(ids))})" if ids else "0")
+                params.extend(ids)
+        if min_sqft is not None:
+            clauses.append("s.sq_ft >= ?")
+            params.append(min_sqft)
+        if max_sqft is not None:
+            clauses.append("s.sq_ft <= ?")
+            params.append(max_sqft)
+        return " AND ".join(clauses), params
+
+    def suites(self, date=None, start=None, end=None, last=None, city=None, prop=None, suite_type=None,
+               min_sqft=None, max_sqft=None):
+        """Suite rows (dicts with SUITE_COLUMNS) matching every given filter, by date, property and position."""
+        start, end = self.date_range(date, start, end, last)
+        where, params = self.filters(start, end, city, prop, suite_type, min_sqft, max_sqft)
+        rows = self.conn.execute(
+            "SELECT s.date, s.property_id, d.city_id, s.suite_number, s.type_id, s.sq_ft, "
+            "s.availability_id, s.net_rent_id, s.additional_rent_id "
+            "FROM suites s JOIN property_days d ON d.date = s.date AND d.property_id = s.property_id "
+            f"WHERE {where} ORDER BY s.date, d.position, s.position", params)
+        labels = self.store.labels.value
+        return [dict(zip(SUITE_COLUMNS, (
+            row[0], self.store.properties.value(row[1]), self.store.cities.value(row[2]), row[3],
+            self.store.types.value(row[4]), row[5], labels(row[6]), labels(row[7]), labels(row[8]))))
+            for row in rows]
+
+    def totals(self, date=None, start=None, end=None, last=None, city=None, prop=None, suite_type=None,
+               min_sqft=None, max_sqft=None, by=("date",)):
+        """
+        Suite count and sq ft per group of by (any of TOTAL_DIMENSIONS), as dicts.
+
+        Without a property or size filter this reads the precomputed daily_totals table
+        (a few rows per day); otherwise it aggregates the matching suites.
+        """
+        for dimension in by:
+            if dimension not in TOTAL_DIMENSIONS:
+                raise ValueError(f"Unknown total dimension: {dimension}")
+        start, end = self.date_range(date, start, end, last)
+        if prop is None and min_sqft is None and max_sqft is None:
+            city_column = "s.city_id"
+            where, params = self.filters(start, end, city, None, suite_type, city_column=city_column)
+            source = "daily_totals s"
+            aggregates = "SUM(s.suites), SUM(s.sq_ft)"
+        else:
+            city_column = "d.city_id"
+            where, params = self.filters(start, end, city, prop, suite_type, min_sqft, max_sqft)
+            source = "suites s JOIN property_days d ON d.date = s.date AND d.property_id = s.property_id"
+            aggregates = "COUNT(*), COALESCE(SUM(s.sq_ft), 0)"
+        group = [{"date": "s.date", "city": city_column, "type": "s.type_id"}[dimension] for dimension in by]
+        select = "".join(f"{column}, " for column in group)
+        group_by = f"GROUP BY {', '.join(group)} ORDER BY {', '.join(group)}" if group else ""
+        values = {"date": str, "city": self.store.cities.value, "type": self.store.types.value}
+        result = []
+        for row in self.conn.execute(f"SELECT {select}{aggregates} FROM {source} WHERE {where} {group_by}", params):
+            record = {dimension: values[dimension](value) for dimension, value in zip(by, row)}
+            record.update(suites=row[-2] or 0, sq_ft=row[-1] or 0)
+            result.append(record)
+        return result
+
+
+def open_query(data_dir="data"):
+    """A VacancyQuery over the store, after ingesting any new or changed snapshots."""
+    store = VacancyStore()
+    store.ingest_dir(data_dir)
+    return VacancyQuery(store)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Point-in-time queries over the vacancy history.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("suites", "list matching suites"), ("totals", "suite count and sq ft")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--date", help="one day, served by the latest snapshot on or before it (default: the latest)")
+        cmd.add_argument("--start", help="first date of a range")
+        cmd.add_argument("--end", help="last date of a range (default: the latest)")
+        cmd.add_argument("--last", type=int, help="the N days ending at --end")
+        cmd.add_argument("--city")
+        cmd.add_argument("--property", help="substring of the property name")
+        cmd.add_argument("--type", help="suite type, e.g. Office")
+        cmd.add_argument("--min-sqft", type=int)
+        cmd.add_argument("--max-sqft", type=int)
+        cmd.add_argument("--json", action="store_true", help="print JSON instead of text")
+        if name == "totals":
+            cmd.add_argument("--by", default="date", help="comma-separated: date, city, type")
+    args = parser.parse_args(argv)
+
+    query = open_query()
+    # Resolved up front so the output can say which snapshots answered the query
+    start, end = query.date_range(args.date, args.start, args.end, args.last)
+    filters = dict(start=start, end=end, city=args.city,
+                   prop=args.property, suite_type=args.type, min_sqft=args.min_sqft, max_sqft=args.max_sqft)
+    if end is None:
+        rows = []
+    elif args.command == "suites":
+        rows = query.suites(**filters)
+    else:
+        rows = query.totals(by=tuple(filter(None, args.by.split(','))), **filters)
+    query.store.close()
+
+    if args.json:
+        print(json.dumps({"start": start, "end": end, "rows": rows}, indent=4, ensure_ascii=False))
+        return 0
+    requested = args.date or args.end
+    if end is None:
+        print(f"No snapshot on or before {requested}" if requested else "No snapshots ingested")
+    elif start == end:
+        print(f"Snapshot of {end}" + (f" (latest on or before {requested})" if requested and requested != end else ""))
+    else:
+        print(f"Snapshots from {start} to {end}" + (f" (latest on or before {requested})" if requested and requested != end else ""))
+    if args.command == "suites":
+        for row in rows:
+            print(f"{row['date']} {row['property']} ({row['city']}) suite {row['suite_number']}: "
+                  f"{row['type']}, {row['sq_ft']} sq ft, {row['availability']}")
+        print(f"{len(rows)} suites, {sum(row['sq_ft'] or 0 for row in rows)} sq ft")
+    else:
+        for row in rows:
+            group = ' / '.join(str(row[dimension]) for dimension in TOTAL_DIMENSIONS if dimension in row)
+            print(f"{group or 'all'}: {row['suites']} suites, {row['sq_ft']} sq ft")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from archive import PageArchive
+from listing_parser import parse_listing
+from pipeline import SnapshotWriter
+from suite_parser import parse_suites_detailed
+
+# Directory where the JSON files are stored
+data_dir = "data"
+
+
+def reparse_date(date, archive_root=None):
+    """
+    Rebuild data/allied_<date>_cleaned.json from the raw pages archived for date.
+
+    The listing comes from the archived listing page, or from that day's _updated.json
+    when it was not archived. Properties whose detail page is not archived (carried
+    forward, skipped) keep the suites recorded in _updated.json.
+    Returns (date, number of detail pages re-parsed), or (date, None) if nothing is archived.
+    """
+    archive = PageArchive(archive_root)
+    index = archive.index(date)
+    if not index:
+        return date, None
+
+    updated_file = os.path.join(data_dir, f"allied_{date}_updated.json")
+    previous = {}
+    if os.path.exists(updated_file):
+        with open(updated_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    old_properties = {p['name']: p for p in previous.get('properties', [])}
+
+    if 'listing' in index:
+        properties = parse_listing(archive.load(index['listing']))
+    else:
+        properties = [
+            {k: p[k] for k in ("name", "city", "total_gla", "available_suites", "link")}
+            for p in previous.get('properties', [])
+        ]
+
+    output_file = os.path.join(data_dir, f"allied_{date}_cleaned.json")
+    writer = SnapshotWriter(date, cleaned_path=output_file)
+    reparsed = 0
+    for prop in properties:
+        updated_prop = prop.copy()
+        old = old_properties.get(prop['name'], {})
+        if prop['available_suites'] > 0 and prop['link'] in index:
+            suites, available_sqft, _ = parse_suites_detailed(archive.load(index[prop['link']]))
+            reparsed += 1
+        else:
+            suites, available_sqft = old.get('suites', []), old.get('available_sqft', 0)
+            if 'carried_from' in old:
+                updated_prop['carried_from'] = old['carried_from']
+        updated_prop['available_sqft'] = available_sqft
+        updated_prop['suites'] = suites
+        writer.write(updated_prop)
+
+    writer.close(previous.get('skipped_properties', []))
+    return date, reparsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse archived pages into _cleaned.json files.")
+    parser.add_argument("start", nargs="?", help="first date (YYYY-MM-DD), default: oldest archived")
+    parser.add_argument("end", nargs="?", help="last date (YYYY-MM-DD), default: start, or newest archived")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--archive", default=None, help="archive directory")
+    args = parser.parse_args(argv)
+
+    dates = PageArchive(args.archive).dates()
+    start = args.start or (dates[0] if dates else "")
+    end = args.end or args.start or (dates[-1] if dates else "")
+    dates = [d for d in dates if start <= d <= end]
+    if not dates:
+        print(f"No archived dates between {start} and {end}")
+        return 1
+
+    print(f"Re-parsing {len(dates)} days with {args.workers} workers")
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for date, reparsed in pool.map(reparse_date, dates, [args.archive] * len(dates)):
+            if reparsed is None:
+                print(f"{date}: nothing archived")
+            else:
+                print(f"{date}: re-parsed {reparsed} detail pages into allied_{date}_cleaned.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
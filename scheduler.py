@@ -0,0 +1,329 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from datetime import date as Date, datetime
+
+from incremental import LISTING_FIELDS
+from pipeline import SnapshotWriter, clean_property
+from store import cleaned_files
+
+# Detail-page requests per hour (ALLIED_BUDGET_PER_HOUR overrides). The default spreads
+# one daily batch (every property with suites plus the listing) over 24 hours, so the
+# site sees no more load than before.
+budget_per_hour = int(os.environ.get("ALLIED_BUDGET_PER_HOUR", 0)) or None
+
+# Seconds between listing refreshes; each refresh uses one request of the budget
+listing_every = 3600
+
+# A listing fetched over HTTP with fewer than this share of the known properties is taken
+# as partial (Chrome scrolls to load the rest) and fetched with Chrome instead, since
+# properties missing from a listing lose their state
+min_listing_share = 0.9
+
+# A property is revisited once the chance it changed reaches this probability
+target_probability = 0.5
+
+# Revisit intervals are kept within these bounds (seconds)
+min_interval = 3600
+max_interval = 7 * 86400
+
+# Prior added to every property's history: prior_changes changes over prior_days days,
+# so a property with little history starts near one change a month
+prior_changes = 1.0
+prior_days = 30.0
+
+rolling_file = os.path.join("data", "allied_rolling.json")
+state_file = os.path.join("data", "scheduler_state.json")
+
+# Fields that make up the scraped part of a property
+SCRAPED_FIELDS = ("available_sqft", "suites")
+
+
+def listing_entry(prop):
+    """The listing-page part of a property, which is what scrape_property takes."""
+    return {k: prop[k] for k in ("name", "city", "total_gla", "available_suites", "link") if k in prop}
+
+
+def changed(old, new):
+    """True when a property's listing fields or suites differ between two observations."""
+    return any(old.get(field) != new.get(field) for field in LISTING_FIELDS + SCRAPED_FIELDS)
+
+
+def learn_rates(data_dir):
+    """
+    Per-property change counts from the _cleaned.json history.
+
+    Consecutive snapshots are compared property by property; days where a property was
+    carried forward rather than scraped are not counted as observations.
+    Returns ({name: [changes, observed days]}, latest date, latest snapshot).
+    """
+    history = {}
+    prev_date = prev = None
+    for date, f in cleaned_files(data_dir):
+        with open(os.path.join(data_dir, f), 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+        curr_date = Date.fromisoformat(date)
+        if prev is not None:
+            days = (curr_date - prev_date).days
+            old_props = {p['name']: p for p in prev.get('properties', [])}
+            for prop in data.get('properties', []):
+                old = old_props.get(prop['name'])
+                if old is None or 'carried_from' in prop:
+                    continue
+                counts = history.setdefault(prop['name'], [0, 0])
+                counts[0] += changed(old, prop)
+                counts[1] += days
+        prev_date, prev = curr_date, data
+    return history, prev_date, prev
+
+
+class PropertyState:
+    """What the scheduler knows about one property."""
+
+    def __init__(self, prop, changes=0.0, days=0.0, last_visit=None, forced=False):
+        self.prop = prop
+        self.changes = changes
+        self.days = days
+        self.last_visit = last_visit
+        self.forced = forced
+
+    @property
+    def rate(self):
+        """Estimated changes per day."""
+        return (self.changes + prior_changes) / (self.days + prior_days)
+
+    def change_probability(self, now):
+        """Chance the property changed since the last visit (Poisson changes at rate)."""
+        if self.last_visit is None or self.forced:
+            return 1.0
+        elapsed_days = max(0.0, now - self.last_visit) / 86400
+        return 1 - math.exp(-self.rate * elapsed_days)
+
+    def revisit_interval(self):
+        """Seconds until change_probability reaches target_probability, within the bounds."""
+        seconds = -math.log(1 - target_probability) / self.rate * 86400
+        return min(max(seconds, min_interval), max_interval)
+
+    def due(self, now):
+        if self.last_visit is None or self.forced:
+            return True
+        return now - self.last_visit >= self.revisit_interval()
+
+    def to_json(self):
+        return {"prop": self.prop, "changes": self.changes, "days": self.days, "last_visit": self.last_visit,
+                "forced": self.forced}
+
+
+class Scheduler:
+    """
+    Spends a fixed request budget per hour on the properties most likely to have changed.
+
+    Every tick makes one request: a listing refresh when one is due, otherwise the due
+    property with the highest change probability. Listing changes force an immediate
+    revisit of the properties involved. Each visit updates the property's change rate
+    and the rolling snapshot.
+    """
+
+    def __init__(self, states, budget=None, last_listing=None):
+        self.states = states
+        scraped = sum(1 for state in states.values() if state.prop.get('available_suites', 0) > 0)
+        self.budget = budget or max(1, math.ceil((scraped + 1) / 24))
+        self.last_listing = last_listing
+
+    @classmethod
+    def from_history(cls, data_dir="data", budget=None):
+        """States from the snapshot history, with the latest snapshot as everyone's last visit."""
+        history, latest_date, latest = learn_rates(data_dir)
+        states = {}
+        if latest is not None:
+            visited = time.mktime(datetime.combine(latest_date, datetime.min.time()).timetuple())
+            for prop in latest.get('properties', []):
+                changes, days = history.get(prop['name'], (0, 0))
+                states[prop['name']] = PropertyState(prop, changes, days, visited)
+        return cls(states, budget)
+
+    @classmethod
+    def load(cls, path=None, data_dir="data", budget=None):
+        """Resume from a saved state file, or start from the history."""
+        path = path or state_file
+        if not os.path.exists(path):
+            return cls.from_history(data_dir, budget)
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        states = {name: PropertyState(**entry) for name, entry in saved['properties'].items()}
+        return cls(states, budget, saved.get('last_listing'))
+
+    def save(self, path=None):
+        path = path or state_file
+        saved = {"last_listing": self.last_listing,
+                 "properties": {name: state.to_json() for name, state in self.states.items()}}
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(saved, f)
+        os.replace(f"{path}.tmp", path)
+
+    def listing_due(self, now):
+        return self.last_listing is None or now - self.last_listing >= listing_every
+
+    def update_listing(self, properties, now):
+        """
+        Apply a fresh listing: new properties and changed listing fields are revisited first.
+
+        A property listed with no suites is never scraped, so its suites are cleared here,
+        as scrape_property does.
+        """
+        self.last_listing = now
+        for prop in properties:
+            if prop['available_suites'] <= 0:
+                prop = dict(prop, available_sqft=0, suites=[])
+            state = self.states.get(prop['name'])
+            if state is None:
+                self.states[prop['name']] = PropertyState(prop, forced=prop['available_suites'] > 0)
+            elif any(state.prop.get(field) != prop[field] for field in LISTING_FIELDS):
+                state.changes += 1
+                state.prop = dict(state.prop, **prop)
+                state.forced = prop['available_suites'] > 0
+        listed = {prop['name'] for prop in properties}
+        for name in [name for name in self.states if name not in listed]:
+            del self.states[name]
+
+    def next_property(self, now):
+        """
+        The property to visit next, or None when all were visited within min_interval.
+
+        Properties past their revisit interval come first; leftover budget goes to the
+        others by change probability.
+        """
+        candidates = [state for state in self.states.values()
+                      if state.prop.get('available_suites', 0) > 0
+                      and (state.last_visit is None or state.forced or now - state.last_visit >= min_interval)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda state: (state.due(now), state.change_probability(now), state.rate))
+
+    def record_visit(self, state, updated_prop, now):
+        if state.last_visit is not None:
+            state.days += max(0.0, now - state.last_visit) / 86400
+            state.changes += changed(state.prop, updated_prop) and not state.forced
+        state.prop = updated_prop
+        state.last_visit = now
+        state.forced = False
+
+    def write_rolling(self, path=None, now=None):
+        """The latest observation of every property, cleaned, as one compact snapshot."""
+        path = path or rolling_file
+        checked = datetime.fromtimestamp(now or time.time()).isoformat(timespec='seconds')
+        writer = SnapshotWriter(checked, cleaned_path=path)
+        for state in self.states.values():
+            prop = dict(state.prop)
+            if state.last_visit is not None:
+                prop['checked_at'] = datetime.fromtimestamp(state.last_visit).isoformat(timespec='seconds')
+            writer.write(prop)
+        writer.close([])
+
+    def plan(self, now):
+        """[(name, rate per day, change probability now, revisit interval in hours)], most urgent first."""
+        rows = [(name, state.rate, state.change_probability(now), state.revisit_interval() / 3600)
+                for name, state in self.states.items() if state.prop.get('available_suites', 0) > 0]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def run(self, scrape, fetch_listing, max_requests=None, clock=time.time, sleep=time.sleep):
+        """
+        Make at most budget requests per hour until max_requests (forever when None).
+
+        scrape(listing entry) returns the updated property, cleaned like the history it
+        is compared with, or None on failure;
+        fetch_listing() returns the listing's properties or None.
+        """
+        interval = 3600 / self.budget
+        next_tick = clock()
+        requests = 0
+        while max_requests is None or requests < max_requests:
+            now = clock()
+            if now < next_tick:
+                sleep(next_tick - now)
+                now = clock()
+            next_tick = max(next_tick + interval, now)
+
+            if self.listing_due(now):
+                properties = fetch_listing()
+                requests += 1
+                if properties:
+                    self.update_listing(properties, now)
+                    print(f"Listing refreshed: {len(properties)} properties")
+                else:
+                    self.last_listing = now
+                    print("Listing refresh failed")
+            else:
+                state = self.next_property(now)
+                if state is None:
+                    continue
+                probability = state.change_probability(now)
+                updated_prop = scrape(listing_entry(state.prop))
+                requests += 1
+                if updated_prop is None:
+                    # Count the attempt as a visit so a failing page does not eat the budget
+                    state.last_visit = now
+                    state.forced = False
+                    continue
+                was_changed = changed(state.prop, updated_prop)
+                self.record_visit(state, updated_prop, now)
+                print(f"Visited {state.prop['name']} (p={probability:.2f}, {state.rate:.3f}/day): "
+                      f"{'changed' if was_changed else 'unchanged'}")
+            self.write_rolling(now=now)
+            self.save()
+        return requests
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continuously revisit properties by how often they change.")
+    parser.add_argument("--budget", type=int, default=budget_per_hour, help="requests per hour")
+    parser.add_argument("--plan", action="store_true", help="print the revisit plan and exit")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests")
+    args = parser.parse_args(argv)
+
+    scheduler = Scheduler.load(budget=args.budget)
+    if args.plan:
+        now = time.time()
+        print(f"Budget: {scheduler.budget} requests per hour")
+        for name, rate, probability, hours in scheduler.plan(now):
+            print(f"{name}: {rate:.3f} changes/day, p={probability:.2f} now, revisit every {hours:.1f}h")
+        return 0
+
+    # Imported here so --plan works without Selenium installed
+    import allied
+    from browser import BrowserSession
+    from fetch import create_session, fetch_page
+    from listing_parser import parse_listing
+
+    url = "https://alliedreit.com/properties/"
+    session = create_session()
+    browser = BrowserSession(allied.create_driver, allied.block_requests)
+
+    def fetch_listing():
+        html = fetch_page(session, url)
+        properties = parse_listing(html) if html else []
+        if properties and len(properties) >= min_listing_share * len(scheduler.states):
+            return properties
+        if properties:
+            print(f"HTTP listing has {len(properties)} of {len(scheduler.states)} properties; using Chrome")
+        return allied.scrape_listing(browser, url)
+
+    def scrape(prop):
+        updated_prop, skip, _ = allied.scrape_property(prop, session, browser)
+        # Drop header rows and recompute available_sqft, as in the _cleaned.json history
+        return None if skip else clean_property(updated_prop)
+
+    print(f"Scheduling {len(scheduler.states)} properties with {scheduler.budget} requests per hour")
+    try:
+        scheduler.run(scrape, fetch_listing, args.requests)
+    finally:
+        session.close()
+        browser.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
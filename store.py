@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import sqlite3
+from datetime import datetime
+
+from history import SnapshotHistory, history_dir
+
+# Consolidated vacancy store built from the _cleaned.json snapshots (ALLIED_STORE overrides)
+store_path = os.environ.get("ALLIED_STORE", os.path.join("data", "vacancy.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cities (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS suite_types (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS labels (id INTEGER PRIMARY KEY, value TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS properties (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    date TEXT PRIMARY KEY,          -- from the file name, as aggregator.py sorts them
+    file TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    snapshot_date TEXT,             -- the "date" field inside the file
+    skipped TEXT NOT NULL           -- skipped_properties as JSON
+);
+CREATE TABLE IF NOT EXISTS property_days (
+    date TEXT NOT NULL,
+    property_id INTEGER NOT NULL REFERENCES properties(id),
+    position INTEGER NOT NULL,
+    city_id INTEGER REFERENCES cities(id),
+    link TEXT,
+    total_gla INTEGER,
+    available_suites INTEGER,
+    available_sqft INTEGER,
+    carried_from TEXT,
+    PRIMARY KEY (date, property_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS suites (
+    date TEXT NOT NULL,
+    property_id INTEGER NOT NULL REFERENCES properties(id),
+    position INTEGER NOT NULL,
+    suite_number TEXT NOT NULL,
+    type_id INTEGER REFERENCES suite_types(id),
+    sq_ft INTEGER,
+    availability_id INTEGER REFERENCES labels(id),
+    net_rent_id INTEGER REFERENCES labels(id),
+    additional_rent_id INTEGER REFERENCES labels(id),
+    PRIMARY KEY (date, property_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_totals (
+    date TEXT NOT NULL,
+    city_id INTEGER REFERENCES cities(id),
+    type_id INTEGER REFERENCES suite_types(id),
+    suites INTEGER NOT NULL,
+    sq_ft INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS suites_by_property ON suites (property_id, date);
+CREATE INDEX IF NOT EXISTS suites_by_type ON suites (type_id, date);
+CREATE INDEX IF NOT EXISTS property_days_by_property ON property_days (property_id, date);
+CREATE INDEX IF NOT EXISTS property_days_by_city ON property_days (city_id, date);
+CREATE INDEX IF NOT EXISTS daily_totals_by_date ON daily_totals (date);
+"""
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or store_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class Dictionary:
+    """Value <-> id cache over one of the dictionary tables."""
+
+    def __init__(self, conn, table, column):
+        self.conn = conn
+        self.table = table
+        self.column = column
+        self.ids = {}
+        self.values = {}
+        for row_id, value in conn.execute(f"SELECT id, {column} FROM {table}"):
+            self.ids[value] = row_id
+            self.values[row_id] = value
+
+    def id(self, value):
+        if value is None:
+            return None
+        row_id = self.ids.get(value)
+        if row_id is None:
+            row_id = self.conn.execute(f"INSERT INTO {self.table} ({self.column}) VALUES (?)", (value,)).lastrowid
+            self.ids[value] = row_id
+            self.values[row_id] = value
+        return row_id
+
+    def value(self, row_id):
+        return self.values.get(row_id)
+
+
+class VacancyStore:
+    """One row per (date, property, suite), with names, cities, types and labels dictionary-encoded."""
+
+    def __init__(self, path=None):
+        self.conn = connect(path)
+        self.cities = Dictionary(self.conn, "cities", "name")
+        self.types = Dictionary(self.conn, "suite_types", "name")
+        self.labels = Dictionary(self.conn, "labels", "value")
+        self.properties = Dictionary(self.conn, "properties", "name")
+        # Stores created before daily_totals existed get their totals filled in once
+        missing = self.conn.execute(
+            "SELECT date FROM snapshots WHERE date NOT IN (SELECT DISTINCT date FROM daily_totals)").fetchall()
+        if missing:
+            with self.conn:
+                for (date,) in missing:
+                    self.refresh_totals(date)
+
+    def close(self):
+        self.conn.close()
+
+    def ingested(self):
+        """{date: (file, mtime_ns, size)} for every ingested snapshot."""
+        return {row[0]: row[1:] for row in self.conn.execute("SELECT date, file, mtime_ns, size FROM snapshots")}
+
+    def is_current(self, date, path, ingested=None):
+        """True when path was ingested for date and has not changed since."""
+        entry = (ingested if ingested is not None else self.ingested()).get(date)
+        if entry is None:
+            return False
+        stat = os.stat(path)
+        return entry[1:] == (stat.st_mtime_ns, stat.st_size)
+
+    def ingest_file(self, date, path, data=None):
+        """(Re)load one _cleaned.json snapshot for date; data is its content when already loaded."""
+        if data is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        stat = os.stat(path)
+        with self.conn:
+            self.conn.execute("DELETE FROM suites WHERE date = ?", (date,))
+            self.conn.execute("DELETE FROM property_days WHERE date = ?", (date,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                (date, os.path.basename(path), stat.st_mtime_ns, stat.st_size,
+                 data.get('date'), json.dumps(data.get('skipped_properties', []))))
+            property_rows = []
+            suite_rows = []
+            seen = set()
+            for position, prop in enumerate(data.get('properties', [])):
+                property_id = self.properties.id(prop['name'])
+                if property_id in seen:
+                    # Same name listed twice; aggregator.py keeps the last one
+                    property_rows = [row for row in property_rows if row[1] != property_id]
+                    suite_rows = [row for row in suite_rows if row[1] != property_id]
+                seen.add(property_id)
+                property_rows.append((
+                    date, property_id, position, self.cities.id(prop.get('city')), prop.get('link'),
+                    prop.get('total_gla'), prop.get('available_suites'), prop.get('available_sqft'),
+                    prop.get('carried_from')))
+                for suite_position, suite in enumerate(prop.get('suites', [])):
+                    suite_rows.append((
+                        date, property_id, suite_position, suite['suite_number'],
+                        self.types.id(suite.get('type')), suite.get('sq_ft'),
+                        self.labels.id(suite.get('availability')), self.labels.id(suite.get('net_rent')),
+                        self.labels.id(suite.get('additional_rent'))))
+            self.conn.executemany("INSERT INTO property_days VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", property_rows)
+            self.conn.executemany("INSERT INTO suites VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", suite_rows)
+            self.refresh_totals(date)
+
+    def refresh_totals(self, date):
+        """Recompute the per (city, type) suite count and sq ft for date."""
+        self.conn.execute("DELETE FROM daily_totals WHERE date = ?", (date,))
+        self.conn.execute(
+            "INSERT INTO daily_totals "
+            "SELECT s.date, d.city_id, s.type_id, COUNT(*), COALESCE(SUM(s.sq_ft), 0) "
+            "FROM suites s JOIN property_days d ON d.date = s.date AND d.property_id = s.property_id "
+            "WHERE s.date = ? GROUP BY d.city_id, s.type_id", (date,))
+
+    def ingest_dir(self, data_dir):
+        """
+        Ingest every new or changed _cleaned.json in data_dir, and the days only kept in
+        its delta-encoded history (see history.py). Returns the dates loaded.
+        """
+        ingested = self.ingested()
+        history = SnapshotHistory(history_dir(data_dir))
+        loaded = []
+        for date, path, from_history in snapshot_sources(data_dir, history):
+            if not self.is_current(date, path, ingested):
+                self.ingest_file(date, path, history.load(date) if from_history else None)
+                loaded.append(date)
+        return loaded
+
+    def load_snapshot(self, date):
+        """Rebuild the _cleaned.json structure for date, or None if it was not ingested."""
+        row = self.conn.execute("SELECT snapshot_date, skipped FROM snapshots WHERE date = ?", (date,)).fetchone()
+        if row is None:
+            return None
+        suites_by_property = {}
+        for property_id, number, type_id, sq_ft, avail_id, net_id, additional_id in self.conn.execute(
+                "SELECT property_id, suite_number, type_id, sq_ft, availability_id, net_rent_id, additional_rent_id "
+                "FROM suites WHERE date = ? ORDER BY property_id, position", (date,)):
+            suites_by_property.setdefault(property_id, []).append({
+                "suite_number": number,
+                "type": self.types.value(type_id),
+                "sq_ft": sq_ft,
+                "availability": self.labels.value(avail_id),
+                "net_rent": self.labels.value(net_id),
+                "additional_rent": self.labels.value(additional_id),
+            })
+        properties = []
+        for property_id, city_id, link, total_gla, available_suites, available_sqft, carried_from in self.conn.execute(
+                "SELECT property_id, city_id, link, total_gla, available_suites, available_sqft, carried_from "
+                "FROM property_days WHERE date = ? ORDER BY position", (date,)):
+            prop = {
+                "name": self.properties.value(property_id),
+                "city": self.cities.value(city_id),
+                "total_gla": total_gla,
+                "available_suites": available_suites,
+                "link": link,
+                "available_sqft": available_sqft,
+                "suites": suites_by_property.get(property_id, []),
+            }
+            if carried_from is not None:
+                prop["carried_from"] = carried_from
+            properties.append(prop)
+        return {"date": row[0], "properties": properties, "skipped_properties": json.loads(row[1])}
+
+
+def cleaned_files(data_dir):
+    """(date, file name) for every allied_*_cleaned.json in data_dir, sorted by date."""
+    dated_files = []
+    for f in os.listdir(data_dir):
+        if not (f.endswith('_cleaned.json') and f.startswith('allied_')):
+            continue
+        try:
+            date = datetime.strptime(f.split('_')[1], '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        dated_files.append((date.isoformat(), f))
+    dated_files.sort()
+    return dated_files
+
+
+def snapshot_sources(data_dir, history):
+    """
+    (date, path, from history) for every cleaned snapshot of data_dir, sorted by date.
+
+    The _cleaned.json file is used when there is one; days whose file was removed after
+    `history.py migrate --remove` come from the history record instead.
+    """
+    sources = {date: (date, os.path.join(data_dir, f), False) for date, f in cleaned_files(data_dir)}
+    for date in history.dates("cleaned"):
+        if date not in sources:
+            sources[date] = (date, history.path(date, "cleaned"), True)
+    return [sources[date] for date in sorted(sources)]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = argv[0] if argv else "data"
+    store = VacancyStore()
+    loaded = store.ingest_dir(data_dir)
+    store.close()
+    print(f"Ingested {len(loaded)} snapshots into {store_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import re
+from bs4 import BeautifulSoup
+
+# lxml is several times faster than the stdlib parser; fall back when it is not installed
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+AVAILABILITY_RE = re.compile(r'Availability', re.I)
+TYPE_RE = re.compile(r'^Type$', re.I)
+
+# Start of the first h2 that could be the Availability heading
+AVAILABILITY_H2_RE = re.compile(r'<h2\b(?:(?!</h2).)*?availability', re.I | re.S)
+
+
+def availability_section(html):
+    """
+    Cut everything before the Availability h2 so only that part of the page is parsed.
+
+    Every strategy only looks forward from the h2, so the cut does not change results.
+    Returns html unchanged when no candidate heading is found.
+    """
+    match = AVAILABILITY_H2_RE.search(html)
+    return html[match.start():] if match else html
+
+
+def parse_size(size_value):
+    sq_ft_str = re.sub(r'[^\d]', '', size_value.split(' ')[0])
+    return int(sq_ft_str) if sq_ft_str.isdigit() else 0
+
+
+def labelled_suite(suite_number, details):
+    """Build a suite from h4 label -> value details, or None when there is no size."""
+    if 'size' not in details:
+        return None
+    return {
+        'suite_number': suite_number,
+        'type': details.get('type', 'Unknown'),
+        'sq_ft': parse_size(details.get('size', '0 SF')),
+        'availability': details.get('availability', 'Unknown'),
+        'net_rent': details.get('net rent', 'Unknown'),
+        'additional_rent': details.get('additional rent', 'Unknown'),
+    }
+
+
+def h4_detail(h4):
+    label = h4.text.strip().rstrip(':').lower()
+    value_elem = h4.find_next_sibling('p')
+    return label, value_elem.text.strip() if value_elem else ''
+
+
+def parse_table(table):
+    """Table rows, each optionally followed by a single-cell expanded row with rents."""
+    suites = []
+    rows = table.find_all('tr')
+    i = 0
+    while i < len(rows):
+        tds = rows[i].find_all('td')
+        i += 1
+        if len(tds) < 4:
+            continue
+        size_str = tds[2].text.strip().replace(' SF', '').replace(',', '')
+        suite = {
+            'suite_number': re.sub(r'^[v^]\s*', '', tds[0].text.strip()),
+            'type': tds[1].text.strip(),
+            'sq_ft': int(size_str) if size_str.isdigit() else 0,
+            'availability': tds[3].text.strip(),
+            'net_rent': 'Unknown',
+            'additional_rent': 'Unknown',
+        }
+        # Check if next row is expanded
+        if i < len(rows):
+            expanded_tds = rows[i].find_all('td')
+            if len(expanded_tds) == 1:
+                p_elems = expanded_tds[0].find_all('p')
+                for j in range(0, len(p_elems) - 1, 2):
+                    label = p_elems[j].text.strip().rstrip(':').lower()
+                    value = p_elems[j+1].text.strip()
+                    if label == 'net rent':
+                        suite['net_rent'] = value
+                    if label == 'additional rent':
+                        suite['additional_rent'] = value
+                i += 1
+        if suite['sq_ft'] > 0:
+            suites.append(suite)
+    return suites
+
+
+def parse_numbered(h3_elems):
+    """Cards with an h3.number and p.type / p.size / p.avail siblings."""
+    suites = []
+    for h3 in h3_elems:
+        suite_div = h3.find_parent('div')
+        p_type = suite_div.find('p', class_='type')
+        p_size = suite_div.find('p', class_='size')
+        p_avail = suite_div.find('p', class_='avail')
+        # Guess for net rent and additional rent classes
+        p_net = suite_div.find('p', class_='net') or suite_div.find('p', class_='rent') or suite_div.find('p', string=re.compile(r'Net Rent:\s*', re.I))
+        p_additional = suite_div.find('p', class_='additional') or suite_div.find('p', class_='additional-rent') or suite_div.find('p', string=re.compile(r'Additional Rent:\s*', re.I))
+        suites.append({
+            'suite_number': h3.text.strip(),
+            'type': p_type.text.strip() if p_type else 'Unknown',
+            'sq_ft': parse_size(p_size.text.strip() if p_size else '0 SF'),
+            'availability': p_avail.text.strip() if p_avail else 'Unknown',
+            'net_rent': p_net.text.strip() if p_net else 'Unknown',
+            'additional_rent': p_additional.text.strip() if p_additional else 'Unknown',
+        })
+    return suites
+
+
+def parse_generic(h4s):
+    """'Suite #' layouts: one group of h4 labels per suite, each group starting at a Type h4."""
+    suites = []
+    idx = 0
+    for start, h4 in enumerate(h4s):
+        if not (h4.string and TYPE_RE.search(h4.string)):
+            continue
+        idx += 1
+        details = {}
+        for current in h4s[start:]:
+            if current is not h4 and current.text.strip().lower() == 'type':
+                break
+            label, value = h4_detail(current)
+            details[label] = value
+        suite = labelled_suite(f"Suite {idx}", details)
+        if suite:
+            suites.append(suite)
+    return suites
+
+
+def parse_labelled(avail_h2):
+    """Specific suite numbers in h3s, each followed by its h4 labels."""
+    suites = []
+    suite_number = None
+    details = None
+    for elem in avail_h2.find_all_next(['h3', 'h4']):
+        if elem.name == 'h3':
+            if suite_number is not None:
+                suites.append(labelled_suite(suite_number, details))
+            suite_number = elem.text.strip()
+            details = {}
+        elif suite_number is not None:
+            label, value = h4_detail(elem)
+            details[label] = value
+    if suite_number is not None:
+        suites.append(labelled_suite(suite_number, details))
+    return [suite for suite in suites if suite]
+
+
+def extract(soup):
+    """Run the four strategies on a parsed page. Returns (suites, available_sqft, strategy)."""
+    avail_h2 = soup.find('h2', string=AVAILABILITY_RE)
+    if not avail_h2:
+        return [], 0, None
+    table = avail_h2.find_next('table')
+    if table:
+        suites, strategy = parse_table(table), 'table'
+    else:
+        h3_elems = avail_h2.find_all_next('h3', class_='number')
+        if h3_elems:
+            suites, strategy = parse_numbered(h3_elems), 'numbered'
+        else:
+            first_h3 = avail_h2.find_next('h3')
+            if first_h3 and 'suite #' in first_h3.text.lower():
+                suites, strategy = parse_generic(avail_h2.find_all_next('h4')), 'generic'
+            else:
+                suites, strategy = parse_labelled(avail_h2), 'labelled'
+    return suites, sum(suite['sq_ft'] for suite in suites if suite['sq_ft'] > 0), strategy
+
+
+def parse_suites_detailed(html):
+    """
+    Parse a detail page. Returns (suites, available_sqft, strategy).
+
+    strategy names the layout that matched ('table', 'numbered', 'generic' or
+    'labelled'), or is None when the page has no Availability section.
+    """
+    section = availability_section(html)
+    if section is not html:
+        try:
+            result = extract(BeautifulSoup(section, PARSER))
+            if result[2] is not None:
+                return result
+        except AttributeError:
+            # The cut went through an element a strategy needs (e.g. a card's parent div)
+            pass
+    return extract(BeautifulSoup(html, PARSER))
+
+
+def parse_suites(html):
+    """Parse a detail page's Availability section into a list of suite dicts."""
+    return parse_suites_detailed(html)[0]
+
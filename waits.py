@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+
+# Snapshot of the Availability section: None until the h2 exists, then
+# [table rows, expanded rows (single td), h3 count, h4 count, page height].
+# The h3/h4 counts cover the layouts that do not use a table.
+AVAILABILITY_STATE_JS = """
+const h2 = Array.from(document.querySelectorAll('h2')).find(h => /availability/i.test(h.textContent));
+if (!h2) { return null; }
+const table = Array.from(document.querySelectorAll('table')).find(
+    t => h2.compareDocumentPosition(t) & Node.DOCUMENT_POSITION_FOLLOWING);
+const rows = table ? Array.from(table.querySelectorAll('tr')) : [];
+const expanded = rows.filter(r => r.querySelectorAll('td').length === 1).length;
+return [rows.length, expanded, document.querySelectorAll('h3').length,
+        document.querySelectorAll('h4').length, document.body.scrollHeight];
+"""
+
+
+@contextmanager
+def timed_phase(timings, name):
+    """Record the wall time of the enclosed block in timings[name] (seconds)."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.monotonic() - start, 2)
+
+
+def availability_state(driver):
+    return driver.execute_script(AVAILABILITY_STATE_JS)
+
+
+def wait_until_stable(driver, probe, timeout, stable_for=1.0, poll=0.25):
+    """
+    Poll probe(driver) until it returns the same non-None value for stable_for seconds.
+
+    Returns (value, settled). On timeout the last value is returned with settled=False,
+    so callers can still parse whatever the page has rendered.
+    """
+    deadline = time.monotonic() + timeout
+    last = probe(driver)
+    since = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if last is not None and now - since >= stable_for:
+            return last, True
+        if now >= deadline:
+            return last, False
+        time.sleep(poll)
+        value = probe(driver)
+        if value != last:
+            last = value
+            since = time.monotonic()
+
+
+def wait_for_availability(driver, timeout, stable_for=1.0):
+    """Wait until the Availability h2 exists and its rows stop changing."""
+    return wait_until_stable(driver, availability_state, timeout, stable_for)